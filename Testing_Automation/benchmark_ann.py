@@ -0,0 +1,90 @@
+# Description: Recall / latency / size benchmark of FAISS index specs against the exact Flat index.
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from processing.index_utils import build_index, has_exact_vectors, index_bytes, normalize_vectors, set_search_params
+from processing.rerank import ExactReranker
+
+DEFAULT_SPECS = ["Flat", "fp16", "sq8", "pq", "HNSW32", "HNSW32,SQ8", "IVF256,Flat", "IVF256,SQ8", "IVF256,PQ48",
+                 "OPQ48,IVF256,PQ48"]
+
+
+def load_vectors(vectors_file, count, dim, seed=0):
+    """Real embeddings from the indexer's vectors file, or clustered synthetic ones shaped like them."""
+    if vectors_file and os.path.exists(vectors_file):
+        return np.asarray(np.load(vectors_file, mmap_mode="r")[:count], dtype="float32")
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(max(1, count // 50), dim)).astype("float32")
+    vectors = centres[rng.integers(len(centres), size=count)] + 0.3 * rng.normal(size=(count, dim)).astype("float32")
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def timed_search(search, queries, k):
+    """Run the queries one at a time; returns (latencies in ms, result ids)."""
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        _, found = search(query[None, :], k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append(found[0])
+    return latencies, np.array(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark FAISS index specs: recall@k, latency, build time, size.")
+    parser.add_argument("--vectors-file", help="faiss_index.vectors.npy written by FAISSIndexer (synthetic if omitted)")
+    parser.add_argument("--count", type=int, default=50_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--specs", nargs="+", default=DEFAULT_SPECS)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--ef-search", type=int, default=64)
+    parser.add_argument("--train-size", type=int, default=10_000)
+    parser.add_argument("--metric", choices=["ip", "l2"], default="ip",
+                        help="ip = cosine on normalised vectors, as FAISSIndexer builds by default")
+    parser.add_argument("--rerank", type=int, default=4,
+                        help="Also time compressed specs re-ranked over rerank x k candidates from a memmap (0 = off)")
+    args = parser.parse_args()
+
+    vectors = load_vectors(args.vectors_file, args.count + args.queries, args.dim)
+    if args.metric == "ip":
+        vectors = normalize_vectors(vectors)
+    base, queries = vectors[:-args.queries], vectors[-args.queries:]
+    ids = np.arange(len(base), dtype=np.int64)
+    print(f" {len(base)} vectors x {base.shape[1]} dims, {len(queries)} queries, {args.metric}, recall@{args.k} vs Flat\n")
+
+    tmp = tempfile.TemporaryDirectory()
+    vectors_file, manifest_file = os.path.join(tmp.name, "vectors.npy"), os.path.join(tmp.name, "manifest.npz")
+    np.save(vectors_file, base)
+    np.savez(manifest_file, ids=ids)
+
+    truth = None
+    print(f" {'spec':<24}{'build s':>9}{'bytes/vec':>11}{f'recall@{args.k}':>11}{'p50 ms':>9}{'p99 ms':>9}")
+    for spec in ["Flat"] + [s for s in args.specs if s != "Flat"]:
+        start = time.perf_counter()
+        index = build_index(spec, base.shape[1], base[:args.train_size], metric=args.metric)
+        index.add_with_ids(base, ids)
+        set_search_params(index, nprobe=args.nprobe, ef_search=args.ef_search)
+        build_time = time.perf_counter() - start
+
+        runs = [(spec, index.search)]
+        if args.rerank and not has_exact_vectors(index):
+            reranker = ExactReranker(vectors_file, manifest_file, factor=args.rerank)
+            runs.append((f"{spec} +rerank{args.rerank}", lambda q, k: reranker.search(index, q, k)))
+        for name, search in runs:
+            latencies, results = timed_search(search, queries, args.k)
+            if truth is None:
+                truth = results
+            recall = np.mean([len(set(r) & set(t)) / args.k for r, t in zip(results, truth)])
+            print(f" {name:<24}{build_time:>9.2f}{index_bytes(index) / len(base):>11.1f}{recall:>11.3f}"
+                  f"{np.percentile(latencies, 50):>9.3f}{np.percentile(latencies, 99):>9.3f}")
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
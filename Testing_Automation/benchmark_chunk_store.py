@@ -0,0 +1,77 @@
+# Description: Compares startup time and memory of json.load(football_chunks.json) against the mmap ChunkStore.
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import resource
+import tempfile
+import time
+
+from processing.chunk_store import ChunkStore
+from processing.chunking import ArticleChunker
+from Testing_Automation.benchmark_scraper import ARTICLES_FILE
+
+
+def write_corpus(tmp, scale):
+    """Chunk the sample articles, repeat the chunks `scale` times and write them as JSON and as a ChunkStore."""
+    chunks = list(ArticleChunker(ARTICLES_FILE, None, dedup=False).iter_chunks())
+    chunks = [{**chunk, "url": f"{chunk['url']}?copy={copy}"} for copy in range(scale) for chunk in chunks]
+    json_file = os.path.join(tmp, "football_chunks.json")
+    with open(json_file, "w", encoding="utf-8") as f:
+        json.dump(chunks, f, indent=4, ensure_ascii=False)
+    store_dir = os.path.join(tmp, "chunk_store")
+    ChunkStore.build(chunks, store_dir)
+    return json_file, store_dir, len(chunks)
+
+
+def measure(kind, path, lookups, results):
+    """Run in a fresh process so the RSS high-water mark belongs to this loader alone."""
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if kind == "json":
+        with open(path, "r", encoding="utf-8") as f:
+            chunks = json.load(f)
+    else:
+        chunks = ChunkStore(path)
+    load_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in lookups:
+        chunks[i]["content"]
+    lookup_time = time.perf_counter() - start
+
+    results[kind] = {
+        "load_ms": load_time * 1000,
+        "lookup_us": lookup_time / len(lookups) * 1e6,
+        "rss_growth_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before,
+        "sample": [chunks[i] for i in lookups[:20]],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the JSON chunk file against the mmap chunk store.")
+    parser.add_argument("--scale", type=int, default=10, help="How many times to repeat the sample chunks")
+    parser.add_argument("--lookups", type=int, default=10_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_file, store_dir, count = write_corpus(tmp, args.scale)
+        lookups = [random.randrange(count) for _ in range(args.lookups)]
+        print(f" {count} chunks, JSON file {os.path.getsize(json_file) / 1e6:.1f} MB\n")
+
+        results = multiprocessing.Manager().dict()
+        for kind, path in (("json", json_file), ("chunk_store", store_dir)):
+            proc = multiprocessing.Process(target=measure, args=(kind, path, lookups, results))
+            proc.start()
+            proc.join()
+
+        print(f" {'loader':<13}{'startup ms':>12}{'lookup us':>11}{'RSS growth KB':>16}")
+        for kind in ("json", "chunk_store"):
+            r = results[kind]
+            print(f" {kind:<13}{r['load_ms']:>12.1f}{r['lookup_us']:>11.2f}{r['rss_growth_kb']:>16}")
+        print(f"\n Same chunks: {'yes' if results['json']['sample'] == results['chunk_store']['sample'] else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# Description: Benchmarks ArticleChunker throughput at different worker counts.
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+from processing.chunking import ArticleChunker
+from Testing_Automation.benchmark_scraper import ARTICLES_FILE
+
+
+def write_scaled_corpus(path, factor):
+    """Write the articles file duplicated `factor` times as JSON Lines and return the article count."""
+    with open(ARTICLES_FILE, "r", encoding="utf-8") as f:
+        articles = json.load(f)
+    with open(path, "w", encoding="utf-8") as f:
+        for copy in range(factor):
+            for article in articles:
+                f.write(json.dumps({**article, "url": f"{article['url']}?copy={copy}"}, ensure_ascii=False) + "\n")
+    return len(articles) * factor
+
+
+def run(articles_path, workers, chunk_tokens=None):
+    """Chunk the corpus with `workers` processes; return (seconds, chunk count, digest of the output)."""
+    # The corpus is made of repeated copies, which dedup would drop; measure the chunking itself
+    chunker = ArticleChunker(articles_path, None, workers=workers, chunk_tokens=chunk_tokens, dedup=False)
+    digest = hashlib.sha256()
+    count = 0
+    start = time.perf_counter()
+    for chunk in chunker.iter_chunks():
+        digest.update(json.dumps(chunk, ensure_ascii=False).encode("utf-8"))
+        count += 1
+    return time.perf_counter() - start, count, digest.hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark serial vs multi-process chunking.")
+    parser.add_argument("--scale", type=int, default=20, help="How many times to duplicate football_articles.json")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--chunk-tokens", type=int, default=None,
+                        help="Use token-budget chunking with the embedding model's tokenizer (e.g. 256)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        articles_path = os.path.join(tmp, "articles.jsonl")
+        num_articles = write_scaled_corpus(articles_path, args.scale)
+        print(f" {num_articles} articles ({args.scale}x corpus), {os.cpu_count()} CPUs\n")
+
+        baseline = None
+        print(f" Mode: {f'{args.chunk_tokens} tokens per chunk' if args.chunk_tokens else '500 characters per chunk'}")
+        print(f" {'workers':>8}{'seconds':>10}{'articles/sec':>15}{'speedup':>10}{'chunks':>9}{'same output':>13}")
+        for workers in args.workers:
+            elapsed, count, digest = run(articles_path, workers, args.chunk_tokens)
+            baseline = baseline or (elapsed, digest)
+            print(f" {workers:>8}{elapsed:>10.2f}{num_articles / elapsed:>15.0f}{baseline[0] / elapsed:>9.1f}x{count:>9}"
+                  f"{'yes' if digest == baseline[1] else 'NO':>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# Description: Benchmarks FAISSIndexer embedding throughput for different worker counts and batch sizes.
+import argparse
+import json
+import os
+import resource
+import tempfile
+import time
+
+from processing.chunking import ArticleChunker
+from processing.vectorization import FAISSIndexer
+from Testing_Automation.benchmark_scraper import ARTICLES_FILE
+
+
+def write_chunks(path, scale):
+    chunks = list(ArticleChunker(ARTICLES_FILE, None, dedup=False).iter_chunks()) * scale
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(chunks, f, ensure_ascii=False)
+    return len(chunks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched, multi-process embedding into a memmap.")
+    parser.add_argument("--scale", type=int, default=2, help="How many times to repeat the sample chunks")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[32, 128])
+    parser.add_argument("--dtype", default="float32", choices=["float32", "float16"])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        chunked_file = os.path.join(tmp, "football_chunks.json")
+        count = write_chunks(chunked_file, args.scale)
+        print(f" {count} chunks, {os.cpu_count()} CPUs, {args.dtype} vectors\n")
+        print(f" {'workers':>8}{'batch':>7}{'seconds':>10}{'chunks/sec':>12}{'max RSS MB':>12}")
+        for workers in args.workers:
+            for batch_size in args.batch_sizes:
+                indexer = FAISSIndexer(chunked_file, os.path.join(tmp, "faiss_index"), batch_size=batch_size,
+                                       workers=workers, vector_dtype=args.dtype)
+                start = time.perf_counter()
+                indexer.create_faiss_index()
+                elapsed = time.perf_counter() - start
+                rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+                print(f" {workers:>8}{batch_size:>7}{elapsed:>10.2f}{count / elapsed:>12.1f}{rss_mb:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
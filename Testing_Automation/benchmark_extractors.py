@@ -0,0 +1,84 @@
+# Description: Microbenchmark of the article extractor backends (pages/sec and peak memory).
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import resource
+import time
+import tracemalloc
+
+from scrapers.extractors import EXTRACTORS, get_extractor
+from Testing_Automation.benchmark_scraper import ARTICLES_FILE, build_article_page
+
+
+def load_pages(pages_dir=None):
+    """Load saved BBC article pages (*.html) or render canned pages from the articles file."""
+    if pages_dir:
+        pages = []
+        for path in sorted(glob.glob(os.path.join(pages_dir, "*.html"))):
+            with open(path, "r", encoding="utf-8") as f:
+                pages.append(f.read())
+        return pages
+    with open(ARTICLES_FILE, "r", encoding="utf-8") as f:
+        return [build_article_page(article) for article in json.load(f)]
+
+
+def measure_backend(backend, pages, repeat, results):
+    """Run in a fresh process so the RSS high-water mark belongs to this backend alone."""
+    extractor = get_extractor(backend)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for html in pages:
+            extractor.extract(html)
+    elapsed = time.perf_counter() - start
+    rss_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+
+    # Separate pass: tracemalloc slows Python code down, so it is kept out of the timing
+    tracemalloc.start()
+    for html in pages:
+        extractor.extract(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    results[backend] = {
+        "pages_per_sec": len(pages) * repeat / elapsed,
+        "peak_python_kb": peak / 1024,
+        "rss_growth_kb": rss_growth,
+        "output": [extractor.extract(html) for html in pages],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the article extractor backends.")
+    parser.add_argument("--pages-dir", help="Directory of saved BBC article pages (*.html)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--backends", nargs="+", default=list(EXTRACTORS))
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages_dir)
+    total_mb = sum(len(p) for p in pages) / 1e6
+    print(f" {len(pages)} pages ({total_mb:.1f} MB), {args.repeat} passes each\n")
+
+    results = multiprocessing.Manager().dict()
+    for backend in args.backends:
+        try:
+            get_extractor(backend)
+        except ImportError as e:
+            print(f" {backend:<14} skipped: {e}")
+            continue
+        proc = multiprocessing.Process(target=measure_backend, args=(backend, pages, args.repeat, results))
+        proc.start()
+        proc.join()
+
+    reference = results.get("beautifulsoup", {}).get("output")
+    print(f" {'backend':<14}{'pages/sec':>12}{'peak heap KB':>15}{'RSS growth KB':>16}{'parity':>9}")
+    for backend, r in results.items():
+        parity = "-" if reference is None else ("yes" if r["output"] == reference else "NO")
+        print(f" {backend:<14}{r['pages_per_sec']:>12.1f}{r['peak_python_kb']:>15.0f}{r['rss_growth_kb']:>16}{parity:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# Description: Compares cold-start time and private memory of a heap-loaded FAISS index against a memory-mapped one.
+import argparse
+import multiprocessing
+import os
+import re
+import tempfile
+import time
+
+import numpy as np
+
+from processing.index_utils import build_index, normalize_vectors, read_index, write_index
+
+
+def private_memory_kb():
+    """Anonymous (non-shareable) memory of this process; the mapped index file is page cache, not counted."""
+    with open("/proc/self/smaps_rollup", "r", encoding="utf-8") as f:
+        return int(re.search(r"^Anonymous:\s+(\d+)", f.read(), re.M).group(1))
+
+
+def measure(kind, path, queries, results):
+    """Run in a fresh process so the memory reading belongs to this loader alone."""
+    before = private_memory_kb()
+    start = time.perf_counter()
+    index = read_index(path, mmap=kind == "mmap")
+    load_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _, ids = index.search(queries, 5)
+    results[kind] = {
+        "load_ms": load_time * 1000,
+        "first_search_ms": (time.perf_counter() - start) * 1000,
+        "private_kb": private_memory_kb() - before,
+        "ids": ids.tolist(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark faiss.read_index against a memory-mapped load.")
+    parser.add_argument("--index", help="Saved index to load (a synthetic one is built if omitted)")
+    parser.add_argument("--spec", default="Flat", help="index_factory spec of the synthetic index")
+    parser.add_argument("--count", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.index
+        if not path:
+            path = os.path.join(tmp, "faiss_index")
+            vectors = normalize_vectors(np.random.default_rng(0).normal(size=(args.count, args.dim)))
+            index = build_index(args.spec, args.dim, vectors[:20_000], metric="ip")
+            index.add_with_ids(vectors, np.arange(args.count, dtype=np.int64))
+            write_index(index, path)
+            del index, vectors
+        queries = normalize_vectors(np.random.default_rng(1).normal(size=(10, args.dim)))
+        print(f" {path}: {os.path.getsize(path) / 1e6:.1f} MB on disk\n")
+
+        results = multiprocessing.Manager().dict()
+        for kind in ("heap", "mmap"):
+            proc = multiprocessing.Process(target=measure, args=(kind, path, queries, results))
+            proc.start()
+            proc.join()
+
+        print(f" {'loader':<8}{'load ms':>10}{'1st search ms':>15}{'private MB':>12}")
+        for kind in ("heap", "mmap"):
+            r = results[kind]
+            print(f" {kind:<8}{r['load_ms']:>10.1f}{r['first_search_ms']:>15.1f}{r['private_kb'] / 1024:>12.1f}")
+        print(f"\n Same results: {'yes' if results['heap']['ids'] == results['mmap']['ids'] else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
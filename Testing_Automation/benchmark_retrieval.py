@@ -0,0 +1,65 @@
+# Description: Compares one-query-at-a-time retrieval against RetrievalEngine.search_batch.
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from processing.index_utils import build_index, normalize_vectors
+from processing.retrieval_engine import RetrievalEngine
+
+TEST_CASES_FILE = "/home/shtlp_0060/Desktop/Python Data Scrapping Project/data/football_test_cases/football_test_cases_ragas.json"
+
+
+def load_questions(path, count):
+    """Questions from the RAGAs test cases, or generated ones of similar length if the file is missing."""
+    if path and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            questions = [case["question"] for case in json.load(f)]
+    else:
+        questions = [f"Which club did player number {i} join after scoring {i % 40} goals last season?" for i in range(count)]
+    return (questions * (count // max(1, len(questions)) + 1))[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-query retrieval against batched retrieval.")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--test-cases", default=TEST_CASES_FILE)
+    parser.add_argument("--queries", type=int, default=1011)
+    parser.add_argument("--chunks", type=int, default=20_000, help="Size of the synthetic index searched")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+
+    model = SentenceTransformer(args.model)
+    dim = model.get_sentence_embedding_dimension()
+    index = build_index("Flat", dim, metric="ip")
+    index.add_with_ids(normalize_vectors(np.random.default_rng(0).normal(size=(args.chunks, dim))),
+                       np.arange(args.chunks, dtype=np.int64))
+    chunks = [{"content": f"chunk {i}"} for i in range(args.chunks)]
+    engine = RetrievalEngine(model, index, chunks)
+    questions = load_questions(args.test_cases, args.queries)
+    engine.search_batch(questions[:8], args.k)  # warm up
+
+    start = time.perf_counter()
+    single = [engine.search_batch([q], args.k)[0] for q in questions]
+    single_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = []
+    for offset in range(0, len(questions), args.batch_size):
+        batched.extend(engine.search_batch(questions[offset:offset + args.batch_size], args.k))
+    batch_time = time.perf_counter() - start
+
+    print(f" {len(questions)} queries against {args.chunks} chunks, top {args.k}\n")
+    print(f" {'mode':<14}{'total s':>9}{'queries/s':>11}")
+    print(f" {'one by one':<14}{single_time:>9.2f}{len(questions) / single_time:>11.0f}")
+    print(f" {f'batch {args.batch_size}':<14}{batch_time:>9.2f}{len(questions) / batch_time:>11.0f}")
+    same = sum(a == b for a, b in zip(single, batched))
+    print(f"\n Same results: {same}/{len(questions)} (float rounding may reorder near-ties)")
+
+
+if __name__ == "__main__":
+    main()
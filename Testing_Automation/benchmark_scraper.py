@@ -0,0 +1,171 @@
+# Description: Benchmarks the sequential and concurrent BBC scraper against a local stand-in server.
+import argparse
+import html
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from scrapers.bbc_scraper import BBCFootballScraper
+from scrapers.pipeline import CrawlPipeline, load_jsonl
+
+ARTICLES_FILE = os.path.join(os.path.dirname(__file__), "..", "data", "football_articles", "football_articles.json")
+NUM_CATEGORY_PAGES = len(BBCFootballScraper.CATEGORY_PAGES)
+
+
+def build_category_page(article_paths):
+    """Render a category landing page with BBC-style promo links."""
+    links = "\n".join(
+        f'<li><a class="ssrcss-sxweo-PromoLink" href="{path}"><span>Story {i}</span></a></li>'
+        for i, path in enumerate(article_paths)
+    )
+    return f"<html><head><title>BBC Sport</title></head><body><nav>Home Football</nav><ul>{links}</ul></body></html>"
+
+
+def build_article_page(article):
+    """Render an article page shaped like a BBC Sport article (header, article body, footer noise)."""
+    paragraphs = "\n".join(f"<p>{html.escape(line)}</p>" for line in article["content"].split("\n"))
+    return f"""<!DOCTYPE html>
+<html lang="en-GB"><head><meta charset="utf-8"><title>{html.escape(article['title'])} - BBC Sport</title>
+<script>window.__INITIAL_DATA__ = {{"page": "article", "id": "{html.escape(article['url'])}"}};</script>
+<style>.ssrcss-body {{ font-family: ReithSans; }}</style></head>
+<body><header><nav><ul><li><a href="/sport">Sport</a></li><li><a href="/sport/football">Football</a></li></ul></nav></header>
+<main id="main-content"><article><header><h1 id="main-heading">{html.escape(article['title'])}</h1></header>
+<div class="ssrcss-byline"><p>By BBC Sport</p></div>
+<div data-component="text-block">{paragraphs}</div></article>
+<aside><h2>Related Topics</h2><p>More from BBC Sport</p></aside></main>
+<footer><p>Copyright 2025 BBC. The BBC is not responsible for the content of external sites.</p></footer></body></html>"""
+
+
+def build_site(articles):
+    """Map URL paths to canned HTML for every category page and article."""
+    pages = {}
+    article_paths = []
+    for i, article in enumerate(articles):
+        path = f"/sport/football/articles/bench-{i}"
+        pages[path] = build_article_page(article)
+        article_paths.append(path)
+
+    # Spread the articles over the category pages, with some overlap like the real site
+    for c in range(NUM_CATEGORY_PAGES):
+        listed = article_paths[c::NUM_CATEGORY_PAGES] + article_paths[:5]
+        pages[f"/sport/football/category-{c}"] = build_category_page(listed)
+    return pages
+
+
+class StandInServer:
+    """Threaded local HTTP server that serves canned pages with a fixed per-response latency."""
+
+    def __init__(self, pages, latency=0.15):
+        self.pages = pages
+        self.latency = latency
+        self.requests_served = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real site
+
+            def do_GET(self):
+                time.sleep(server.latency)
+                server.requests_served += 1
+                body = server.pages.get(self.path)
+                if body is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def make_scraper(base_url, **kwargs):
+    """Build a scraper whose category pages and article links point at the stand-in server."""
+    scraper = BBCFootballScraper(**kwargs)
+    scraper.SITE_URL = base_url
+    scraper.CATEGORY_PAGES = [f"{base_url}/sport/football/category-{c}" for c in range(NUM_CATEGORY_PAGES)]
+    return scraper
+
+
+def run_sequential(base_url):
+    """Run the original sequential crawl; its fixed sleeps are counted rather than slept."""
+    slept = []
+    scraper = make_scraper(base_url)
+    start = time.perf_counter()
+    with patch("scrapers.bbc_scraper.time.sleep", side_effect=slept.append):
+        articles = scraper.scrape_articles()
+    return articles, time.perf_counter() - start + sum(slept)
+
+
+def run_concurrent(base_url, concurrency, requests_per_second, burst):
+    """Run the thread-pool crawl with the per-host token bucket."""
+    scraper = make_scraper(base_url, concurrency=concurrency, requests_per_second=requests_per_second, burst=burst)
+    start = time.perf_counter()
+    articles = scraper.scrape_articles_concurrent()
+    elapsed = time.perf_counter() - start
+    scraper.crawl_report()
+    return articles, elapsed
+
+
+def run_pipeline(base_url, concurrency, requests_per_second, burst, output_file):
+    """Run the fetch/parse/write pipeline into a fresh JSON Lines file."""
+    if os.path.exists(output_file):
+        os.remove(output_file)
+    scraper = make_scraper(base_url, concurrency=concurrency, requests_per_second=requests_per_second, burst=burst)
+    start = time.perf_counter()
+    CrawlPipeline(scraper, output_file).run()
+    elapsed = time.perf_counter() - start
+    return list(load_jsonl(output_file)), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the BBC scraper crawl modes against a local stand-in server.")
+    parser.add_argument("--articles", type=int, default=250, help="Number of canned articles to serve")
+    parser.add_argument("--latency", type=float, default=0.15, help="Simulated server latency in seconds")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rps", type=float, default=4.0, help="Requests per second per host")
+    parser.add_argument("--burst", type=int, default=4)
+    parser.add_argument("--pipeline-output", default="/tmp/benchmark_articles.jsonl")
+    args = parser.parse_args()
+
+    with open(ARTICLES_FILE, "r", encoding="utf-8") as f:
+        articles = json.load(f)
+    articles = (articles * (args.articles // len(articles) + 1))[:args.articles]
+
+    with StandInServer(build_site(articles), latency=args.latency) as server:
+        seq_articles, seq_time = run_sequential(server.base_url)
+        con_articles, con_time = run_concurrent(server.base_url, args.concurrency, args.rps, args.burst)
+        pipe_articles, pipe_time = run_pipeline(server.base_url, args.concurrency, args.rps, args.burst,
+                                                args.pipeline_output)
+
+    assert sorted(a["url"] for a in seq_articles) == sorted(a["url"] for a in con_articles)
+    assert sorted(a["url"] for a in seq_articles) == sorted(a["url"] for a in pipe_articles)
+    print(f"\n Articles scraped: {len(con_articles)} ({NUM_CATEGORY_PAGES} category pages)")
+    print(f" Sequential (2s/3s sleeps included): {seq_time:8.1f} s")
+    print(f" Concurrent ({args.concurrency} workers, {args.rps} req/s per host): {con_time:8.1f} s")
+    print(f" Pipelined (fetch/parse/write overlapped): {pipe_time:8.1f} s")
+    print(f" Speedup: {seq_time / con_time:.1f}x (concurrent), {seq_time / pipe_time:.1f}x (pipelined)")
+
+
+if __name__ == "__main__":
+    main()
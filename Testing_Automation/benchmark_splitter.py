@@ -0,0 +1,70 @@
+# Description: Compares the native RecursiveTextSplitter with LangChain's RecursiveCharacterTextSplitter.
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+from processing.chunking import ArticleChunker
+from processing.text_splitter import RecursiveTextSplitter
+from Testing_Automation.benchmark_scraper import ARTICLES_FILE
+
+IMPORTS = {
+    "langchain": "from langchain.text_splitter import RecursiveCharacterTextSplitter",
+    "native": "from processing.text_splitter import RecursiveTextSplitter",
+}
+
+
+def import_seconds(statement, repeats=3):
+    """Best-of-N wall time of a fresh interpreter running `statement`, minus a bare interpreter start."""
+    def run(code):
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-c", code], check=True)
+            best = min(best, time.perf_counter() - start)
+        return best
+    return max(0.0, run(statement) - run("pass"))
+
+
+def split_seconds(splitter, texts, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in texts:
+            splitter.split_text(text)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the native text splitter against LangChain's.")
+    parser.add_argument("--rounds", type=int, default=20, help="Passes over the article corpus")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--chunk-overlap", type=int, default=50)
+    args = parser.parse_args()
+
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    with open(ARTICLES_FILE, "r", encoding="utf-8") as f:
+        texts = [ArticleChunker.clean_text(article.get("content", "")) for article in json.load(f)]
+    splitters = {
+        "langchain": RecursiveCharacterTextSplitter(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap),
+        "native": RecursiveTextSplitter(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap),
+    }
+
+    identical = all(splitters["langchain"].split_text(t) == splitters["native"].split_text(t) for t in texts)
+    print(f" {len(texts)} articles x {args.rounds} rounds, identical chunks: {'yes' if identical else 'NO'}\n")
+
+    results = {}
+    print(f" {'splitter':<10}{'import (s)':>12}{'split (s)':>12}{'articles/sec':>15}")
+    for name, splitter in splitters.items():
+        imported = import_seconds(IMPORTS[name])
+        elapsed = split_seconds(splitter, texts, args.rounds)
+        results[name] = (imported, elapsed)
+        print(f" {name:<10}{imported:>12.3f}{elapsed:>12.3f}{len(texts) * args.rounds / elapsed:>15.0f}")
+
+    print(f"\n Split speedup: {results['langchain'][1] / results['native'][1]:.1f}x, "
+          f"import time saved: {results['langchain'][0] - results['native'][0]:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,37 @@
+import argparse
 import json
 import os
 import time
 import numpy as np
-import faiss
 from sentence_transformers import SentenceTransformer
 from openai import OpenAI
 from ragas import evaluate
 from ragas.metrics import faithfulness, context_precision, answer_correctness
 from ragas.evaluation import EvaluationDataset, SingleTurnSample
+from processing.chunk_store import load_chunk_store
+from processing.index_utils import read_index
+from processing.query_cache import QueryEmbeddingCache
+from processing.retrieval_engine import RetrievalEngine
 
 
 class FootballAIAssistant:
     VECTOR_DB_PATH = "/home/shtlp_0060/Desktop/Python Data Scrapping Project/data/faiss/faiss_index"
     CHUNKED_FILE = "/home/shtlp_0060/Desktop/Python Data Scrapping Project/data/football_chunks/football_chunks.json"
+    CHUNK_STORE_DIR = "/home/shtlp_0060/Desktop/Python Data Scrapping Project/data/football_chunks/chunk_store"
+    MMAP_INDEX = True  # share one page-cache copy of the index between processes instead of a heap copy each
+    RERANK_FACTOR = 4  # candidates re-scored per result when the index stores compressed vectors (0 = off)
+    QUERY_CACHE_SIZE = 1024  # query embeddings kept in memory (0 = off)
+    QUERY_CACHE_TTL = 3600  # seconds
+    QUERY_CACHE_DIR = None  # optional on-disk query embedding cache shared by all processes
     TEST_CASES_FILE = "/home/shtlp_0060/Desktop/Python Data Scrapping Project/data/football_test_cases/football_test_cases_ragas.json"
     EVALUATION_RESULTS_FILE = "/home/shtlp_0060/Desktop/Python Data Scrapping Project/data/evaluation_results/evaluation_result_ragas.json"
 
-    def __init__(self):
-        """Initialize models and load data"""
+    def __init__(self, vector_db_path=None, results_file=None):
+        """Initialize models and load data (optionally against another index / results file, to compare indexes)."""
+        if vector_db_path:
+            self.VECTOR_DB_PATH = vector_db_path
+        if results_file:
+            self.EVALUATION_RESULTS_FILE = results_file
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
         if not self.openai_api_key:
             raise ValueError(" OPENAI_API_KEY environment variable not set.")
@@ -26,30 +40,40 @@ class FootballAIAssistant:
         self.embeddings_model = SentenceTransformer("all-MiniLM-L6-v2")
         self.index = self.load_faiss_index()
         self.chunks = self.load_chunks()
+        self.query_cache = QueryEmbeddingCache("all-MiniLM-L6-v2", self.QUERY_CACHE_SIZE, self.QUERY_CACHE_TTL,
+                                               self.QUERY_CACHE_DIR) if self.QUERY_CACHE_SIZE else None
+        self.engine = RetrievalEngine(self.embeddings_model, self.index, self.chunks,
+                                      vector_db_path=self.VECTOR_DB_PATH, rerank_factor=self.RERANK_FACTOR,
+                                      query_cache=self.query_cache)
 
     def load_faiss_index(self):
         """Load FAISS vector database (handle missing index)."""
         if not os.path.exists(self.VECTOR_DB_PATH):
             raise FileNotFoundError(f" FAISS Index Not Found: {self.VECTOR_DB_PATH}")
-        return faiss.read_index(self.VECTOR_DB_PATH)
+        return read_index(self.VECTOR_DB_PATH, mmap=self.MMAP_INDEX)
 
     def load_chunks(self):
-        """Load pre-processed document chunks."""
-        if not os.path.exists(self.CHUNKED_FILE):
-            raise FileNotFoundError(f" Chunks File Not Found: {self.CHUNKED_FILE}")
-        with open(self.CHUNKED_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
+        """Load pre-processed document chunks, preferring the memory-mapped chunk store."""
+        try:
+            return load_chunk_store(self.CHUNK_STORE_DIR, self.CHUNKED_FILE)
+        except FileNotFoundError:
+            raise FileNotFoundError(f" Chunks File Not Found: {self.CHUNKED_FILE}") from None
 
     def get_relevant_chunks(self, query, top_k=3):
         """Retrieve top_k most relevant text chunks for a query."""
-        query_vector = self.embeddings_model.encode([query])
-        query_vector = np.array(query_vector, dtype="float32")
-        distances, indices = self.index.search(query_vector, top_k)
-        return [self.chunks[i]["content"] for i in indices[0] if i < len(self.chunks)]
-
-    def generate_answer(self, query, max_retries=3):
-        """Generate AI-based answer using OpenAI GPT-4-turbo with retry mechanism."""
-        relevant_texts = self.get_relevant_chunks(query, top_k=3)
+        return self.engine.search(query, top_k)
+
+    def get_relevant_chunks_batch(self, queries, top_k=3):
+        """Retrieve top_k chunks for many queries with one model call and one FAISS search."""
+        return self.engine.search_batch(queries, top_k)
+
+    def generate_answer(self, query, max_retries=3, relevant_texts=None):
+        """Generate AI-based answer using OpenAI GPT-4-turbo with retry mechanism.
+
+        `relevant_texts` skips retrieval when the chunks were already fetched (batched) by the caller.
+        """
+        if relevant_texts is None:
+            relevant_texts = self.get_relevant_chunks(query, top_k=3)
         if not relevant_texts:
             return "I don't have enough information."
 
@@ -84,8 +108,11 @@ class FootballAIAssistant:
                 time.sleep(2 ** attempt)  # Exponential backoff
         return "API Error: Unable to generate answer."
 
-    def evaluate_test_cases_with_ragas(self, batch_size=1, delay_between_batches=5):
-        """Evaluate chatbot responses using RAGAs with error handling and retry."""
+    def evaluate_test_cases_with_ragas(self, batch_size=1, delay_between_batches=5, retrieval_batch_size=256):
+        """Evaluate chatbot responses using RAGAs with error handling and retry.
+
+        Contexts for all pending questions are retrieved up front, `retrieval_batch_size` queries per search.
+        """
         with open(self.TEST_CASES_FILE, "r", encoding="utf-8") as f:
             test_cases = json.load(f)
 
@@ -101,6 +128,16 @@ class FootballAIAssistant:
             print(" No test cases found! Exiting evaluation.")
             return
 
+        pending = list(dict.fromkeys(tc["question"] for tc in test_cases if tc["question"] not in processed_questions))
+        contexts = {}
+        start = time.perf_counter()
+        for offset in range(0, len(pending), retrieval_batch_size):
+            questions = pending[offset:offset + retrieval_batch_size]
+            contexts.update(zip(questions, self.get_relevant_chunks_batch(questions, top_k=3)))
+        print(f" Retrieved contexts for {len(pending)} questions in {time.perf_counter() - start:.2f}s")
+        if self.query_cache is not None:
+            print(f" Query cache: {self.query_cache.report()}")
+
         for i, test_case in enumerate(test_cases):
             user_input = test_case["question"]
 
@@ -108,9 +145,9 @@ class FootballAIAssistant:
             if user_input in processed_questions:
                 continue
 
-            retrieved_contexts = self.get_relevant_chunks(user_input, top_k=3)
+            retrieved_contexts = contexts[user_input]
             ground_truth_answer = test_case["answer"]
-            model_response = self.generate_answer(user_input)
+            model_response = self.generate_answer(user_input, relevant_texts=retrieved_contexts)
 
             # Prepare test case sample
             dataset_list.append(SingleTurnSample(
@@ -129,6 +166,19 @@ class FootballAIAssistant:
                 time.sleep(delay_between_batches)  # Delay to avoid rate limits
 
         print(f"\n Evaluation completed using RAGAs. Results saved in `{self.EVALUATION_RESULTS_FILE}`.")
+        self.summarize_results()
+
+    def summarize_results(self):
+        """Print and return the mean of every score in the results file."""
+        results = self.load_existing_results()
+        scores = {}
+        for key in ("faithfulness_score", "context_precision_score", "correctness_score"):
+            values = [r[key] for r in results if isinstance(r.get(key), (int, float)) and not np.isnan(r[key])]
+            scores[key] = float(np.mean(values)) if values else None
+        print(f" Index: {self.VECTOR_DB_PATH}")
+        for key, value in scores.items():
+            print(f"   {key}: {'n/a' if value is None else f'{value:.3f}'}")
+        return scores
 
     def load_existing_results(self):
         """Load existing evaluation results to avoid duplication."""
@@ -184,5 +234,10 @@ class FootballAIAssistant:
 
 
 if __name__ == "__main__":
-    assistant = FootballAIAssistant()
+    parser = argparse.ArgumentParser(description="Evaluate the football assistant with RAGAs.")
+    parser.add_argument("--index", help="FAISS index to retrieve from (default: VECTOR_DB_PATH)")
+    parser.add_argument("--results", help="Results file (default: EVALUATION_RESULTS_FILE); use one per index")
+    args = parser.parse_args()
+
+    assistant = FootballAIAssistant(vector_db_path=args.index, results_file=args.results)
     assistant.evaluate_test_cases_with_ragas(batch_size=1, delay_between_batches=5)
@@ -1,20 +1,37 @@
 import os
+import sys
 import asyncio
 import streamlit as st
-import faiss
-import numpy as np
 import json
 import datetime
+import threading
 import time
 from sentence_transformers import SentenceTransformer
 from openai import OpenAI
 
+# `streamlit run UI/app.py` only puts UI/ on the path; the project root is needed for `processing`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from processing.answer_cache import SemanticAnswerCache
+from processing.chunk_store import load_chunk_store
+from processing.index_utils import read_index
+from processing.query_cache import QueryEmbeddingCache
+from processing.retrieval_engine import RetrievalEngine
+
 # Fix for "RuntimeError: no running event loop"
 asyncio.set_event_loop_policy(asyncio.DefaultEventLoopPolicy())
 
 class FootballQABot:
     VECTOR_DB_PATH = "/home/shtlp_0060/Desktop/Python Data Scrapping Project/data/faiss/faiss_index"
     CHUNKED_FILE = "/home/shtlp_0060/Desktop/Python Data Scrapping Project/data/football_chunks/football_chunks.json"
+    CHUNK_STORE_DIR = "/home/shtlp_0060/Desktop/Python Data Scrapping Project/data/football_chunks/chunk_store"
+    MMAP_INDEX = True  # share one page-cache copy of the index between processes instead of a heap copy each
+    RERANK_FACTOR = 4  # candidates re-scored per result when the index stores compressed vectors (0 = off)
+    QUERY_CACHE_SIZE = 1024  # query embeddings kept in memory (0 = off)
+    QUERY_CACHE_TTL = 3600  # seconds
+    QUERY_CACHE_DIR = None  # optional on-disk query embedding cache shared by all processes
+    ANSWER_CACHE_SIZE = 1000  # answers kept for near-identical questions over the same chunks (0 = off)
+    ANSWER_CACHE_THRESHOLD = 0.92  # minimum cosine similarity between the questions
+    ANSWER_CACHE_TTL = 24 * 3600  # seconds
     LOG_FILE = "/home/shtlp_0060/Desktop/Python Data Scrapping Project/data/QnA_logs/qna_logs.json"
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
@@ -23,44 +40,69 @@ class FootballQABot:
         self.embeddings_model = SentenceTransformer("all-MiniLM-L6-v2")
         self.index = self.load_faiss_index()
         self.chunks = self.load_chunks()
+        self.query_cache = QueryEmbeddingCache("all-MiniLM-L6-v2", self.QUERY_CACHE_SIZE, self.QUERY_CACHE_TTL,
+                                               self.QUERY_CACHE_DIR) if self.QUERY_CACHE_SIZE else None
+        self.engine = RetrievalEngine(self.embeddings_model, self.index, self.chunks,
+                                      vector_db_path=self.VECTOR_DB_PATH, rerank_factor=self.RERANK_FACTOR,
+                                      query_cache=self.query_cache)
+        self.answer_cache = SemanticAnswerCache(self.ANSWER_CACHE_THRESHOLD, self.ANSWER_CACHE_SIZE,
+                                                self.ANSWER_CACHE_TTL) if self.ANSWER_CACHE_SIZE else None
+        self._log_lock = threading.Lock()  # one bot serves every session, see load_bot
 
     def load_faiss_index(self):
         """Load the FAISS index."""
-        return faiss.read_index(self.VECTOR_DB_PATH)
+        return read_index(self.VECTOR_DB_PATH, mmap=self.MMAP_INDEX)
 
     def load_chunks(self):
-        """Load chunked articles from JSON."""
-        with open(self.CHUNKED_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
+        """Load chunked articles from the memory-mapped chunk store, or from JSON if it has not been built."""
+        return load_chunk_store(self.CHUNK_STORE_DIR, self.CHUNKED_FILE)
 
-    def log_interaction(self, question, generated_answer):
-        """Log each user query and its generated answer."""
+    def log_interaction(self, question, generated_answer, timings=None):
+        """Log each user query and its generated answer (with its latency breakdown, if given)."""
         log_entry = {
             "timestamp": datetime.datetime.now().isoformat(),
             "question": question,
             "generated_answer": generated_answer
         }
-        try:
-            with open(self.LOG_FILE, "r+", encoding="utf-8") as f:
-                logs = json.load(f)
-                logs.append(log_entry)
-                f.seek(0)
-                json.dump(logs, f, indent=4, ensure_ascii=False)
-        except (FileNotFoundError, json.JSONDecodeError):
-            with open(self.LOG_FILE, "w", encoding="utf-8") as f:
-                json.dump([log_entry], f, indent=4, ensure_ascii=False)
+        if timings:
+            log_entry["timings"] = {name: round(seconds, 3) for name, seconds in timings.items()}
+        with self._log_lock:
+            try:
+                with open(self.LOG_FILE, "r+", encoding="utf-8") as f:
+                    logs = json.load(f)
+                    logs.append(log_entry)
+                    f.seek(0)
+                    json.dump(logs, f, indent=4, ensure_ascii=False)
+            except (FileNotFoundError, json.JSONDecodeError):
+                with open(self.LOG_FILE, "w", encoding="utf-8") as f:
+                    json.dump([log_entry], f, indent=4, ensure_ascii=False)
 
     def get_relevant_chunks(self, query, top_k=1):
-        """Retrieve the top_k most relevant chunks from FAISS based on the query."""
-        query_vector = np.array(self.embeddings_model.encode([query]), dtype="float32")
-        distances, indices = self.index.search(query_vector, top_k)
-        return [self.chunks[i]["content"] for i in indices[0] if i < len(self.chunks)]
-
-    def generate_answer(self, query):
-        """Retrieve relevant chunks and generate an answer using OpenAI API."""
-        relevant_texts = self.get_relevant_chunks(query, top_k=3)
+        """Retrieve the top_k most relevant chunks; concurrent sessions are batched into one search."""
+        return self.engine.search(query, top_k)
+
+    def generate_answer(self, query, stream=False, timings=None):
+        """Retrieve relevant chunks and generate an answer using OpenAI API.
+
+        A near-identical earlier question answered from the same chunks is served from the answer cache.
+        With `stream=True` a generator of text pieces is returned (for `st.write_stream`) as soon as the
+        request is sent. `timings`, if given, is filled with the seconds spent on retrieval, until the
+        first token, and in total.
+        """
+        timings = {} if timings is None else timings
+        start = time.perf_counter()
+        query_vector, chunk_ids, relevant_texts = self.engine.retrieve(query, 3)
+        timings["retrieval"] = time.perf_counter() - start
         if not relevant_texts:
-            return "I don't have enough information."
+            answer = "I don't have enough information."
+            timings["first_token"] = timings["total"] = time.perf_counter() - start
+            return iter([answer]) if stream else answer
+        if self.answer_cache is not None:
+            cached_answer = self.answer_cache.get(query_vector, chunk_ids, relevant_texts)
+            if cached_answer is not None:
+                timings["first_token"] = timings["total"] = time.perf_counter() - start
+                self.log_interaction(query, cached_answer, timings)
+                return iter([cached_answer]) if stream else cached_answer
 
         context = "\n\n".join(relevant_texts)
         prompt = f"""
@@ -84,15 +126,54 @@ class FootballQABot:
                 {"role": "user", "content": prompt}
             ],
             temperature=0.7,
-            max_tokens=500
+            max_tokens=500,
+            stream=stream
         )
-        
+        if stream:
+            return self._stream_answer(response, query, query_vector, chunk_ids, relevant_texts, start, timings)
+
         generated_answer = response.choices[0].message.content.strip()
-        self.log_interaction(query, generated_answer)
+        timings["first_token"] = timings["total"] = time.perf_counter() - start
+        self._save_answer(query, query_vector, chunk_ids, relevant_texts, generated_answer, timings)
         return generated_answer
 
+    def _stream_answer(self, response, query, query_vector, chunk_ids, relevant_texts, start, timings):
+        """Yield the answer's text deltas as they arrive, then cache and log the full answer (if there was one)."""
+        pieces = []
+        for chunk in response:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                if not pieces:
+                    timings["first_token"] = time.perf_counter() - start
+                pieces.append(delta)
+                yield delta
+        timings["total"] = time.perf_counter() - start
+        timings.setdefault("first_token", timings["total"])
+        if pieces:  # an empty stream is not an answer worth caching or logging
+            self._save_answer(query, query_vector, chunk_ids, relevant_texts, "".join(pieces).strip(), timings)
+
+    def _save_answer(self, query, query_vector, chunk_ids, relevant_texts, answer, timings):
+        if self.answer_cache is not None:
+            self.answer_cache.put(query, query_vector, chunk_ids, relevant_texts, answer)
+        self.log_interaction(query, answer, timings)
+
+@st.cache_resource(show_spinner="Loading the model, FAISS index and chunks...")
+def load_bot():
+    """Build the chatbot once per server process; every rerun and session after that reuses it.
+
+    Streamlit re-executes this script on each widget interaction, so constructing the bot here at
+    module level would reload the model, index and chunks every time. `load_bot.clear()` (the
+    sidebar's reload button) drops it so the next run picks up a rebuilt index.
+    """
+    start = time.perf_counter()
+    bot = FootballQABot()
+    bot.startup_seconds = time.perf_counter() - start
+    print(f"✅ Chatbot loaded in {bot.startup_seconds:.2f} seconds "
+          f"(model, FAISS index and {len(bot.chunks)} chunks)")
+    return bot
+
 # Initialize the chatbot
-bot = FootballQABot()
+bot = load_bot()
 
 # Streamlit UI
 st.title("⚽ Football Q&A Chatbot")
@@ -101,12 +182,13 @@ st.write("Ask any football-related question and get an AI-generated answer!")
 user_query = st.text_input("Type your question here:")
 if st.button("Get Answer"):
     if user_query.strip():
+        timings = {}
         with st.spinner("Searching for the best answer..."):
-            start_time = time.time()
-            answer = bot.generate_answer(user_query)
-            end_time = time.time()
-        st.success(f"**Answer:** {answer}")
-        st.write(f"Response Time: `{end_time - start_time:.2f} seconds`")
+            answer_stream = bot.generate_answer(user_query, stream=True, timings=timings)
+        st.markdown("**Answer:**")
+        st.write_stream(answer_stream)
+        st.write(f"First token: `{timings['first_token']:.2f} seconds` · "
+                 f"Response Time: `{timings['total']:.2f} seconds` (retrieval `{timings['retrieval']:.2f}`)")
     else:
         st.error("⚠️ Please enter a question.")
 
@@ -116,6 +198,24 @@ st.sidebar.markdown("**Latest Football News**")
 st.sidebar.write("[BBC Football News](https://www.bbc.com/sport/football)")
 st.sidebar.write("[ESPN Soccer](https://www.espn.com/soccer/)")
 
+if bot.query_cache is not None:
+    stats = bot.query_cache.report()
+    st.sidebar.markdown("**⚡ Query Cache**")
+    st.sidebar.write(f"{stats['size']}/{stats['max_size']} cached, hit rate {stats['hit_rate']:.0%} "
+                     f"({stats['hits'] + stats['disk_hits']} hits, {stats['misses']} misses)")
+
+if bot.answer_cache is not None:
+    stats = bot.answer_cache.report()
+    st.sidebar.markdown("**💬 Answer Cache**")
+    st.sidebar.write(f"{stats['size']} answers cached, hit rate {stats['hit_rate']:.0%} "
+                     f"({stats['hits']} hits, {stats['misses']} misses, {stats['stale']} stale)")
+
+st.sidebar.markdown("**🔄 Index**")
+st.sidebar.write(f"Loaded in {bot.startup_seconds:.2f} seconds, shared by all sessions")
+if st.sidebar.button("Reload index"):
+    load_bot.clear()
+    st.rerun()
+
 st.sidebar.markdown("**📊 View Past Queries**")
 if st.sidebar.button("Show Log"):
     try:
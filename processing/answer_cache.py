@@ -0,0 +1,112 @@
+import hashlib
+import threading
+import time
+from collections import Counter, OrderedDict
+
+import faiss
+import numpy as np
+
+from processing.index_utils import normalize_vectors
+
+
+def chunk_fingerprint(chunk_ids, texts):
+    """Digest of a retrieved chunk set: ids and texts, independent of their ranking order."""
+    digest = hashlib.blake2b(digest_size=16)
+    for chunk_id, text in sorted(zip(chunk_ids, texts)):
+        digest.update(f"{chunk_id}\0{text}\0".encode("utf-8"))
+    return digest.digest()
+
+
+class SemanticAnswerCache:
+    """Answers to earlier questions, found again by embedding similarity.
+
+    Query embeddings (unit length) are kept in a small inner-product FAISS index. A cached answer is
+    reused when a new question has cosine similarity of at least `threshold` with a cached question
+    and retrieval returned the same set of chunks, with the same text, that the answer was built from.
+    Because the chunk texts are part of the check, an answer never outlives its sources: once a
+    chunk is edited or re-chunked, the entries built on it stop matching and are dropped when next
+    seen. `invalidate` drops them eagerly.
+    """
+
+    def __init__(self, threshold=0.92, max_size=1000, ttl=None, neighbours=5):
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl = ttl
+        self.neighbours = neighbours
+        self.index = None  # created on the first put, once the embedding size is known
+        self.entries = OrderedDict()  # faiss id -> {"query", "chunk_ids", "fingerprint", "answer", "created"}
+        self.next_id = 0
+        self.stats = Counter()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, query_vector, chunk_ids, texts):
+        """The cached answer for this question and retrieved chunk set, or None."""
+        with self._lock:
+            if self.index is None or not self.entries:
+                self.stats["misses"] += 1
+                return None
+            scores, ids = self.index.search(normalize_vectors(query_vector), min(self.neighbours, len(self.entries)))
+            chunk_set = frozenset(chunk_ids)
+            fingerprint = chunk_fingerprint(chunk_ids, texts)
+            for score, entry_id in zip(scores[0], ids[0]):
+                if entry_id < 0 or score < self.threshold:
+                    break
+                entry = self.entries[int(entry_id)]
+                if self.ttl is not None and time.time() - entry["created"] > self.ttl:
+                    self._remove([int(entry_id)], "expired")
+                elif entry["chunk_ids"] == chunk_set:
+                    if entry["fingerprint"] == fingerprint:
+                        self.stats["hits"] += 1
+                        return entry["answer"]
+                    self._remove([int(entry_id)], "stale")  # same chunk ids, edited text
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, query, query_vector, chunk_ids, texts, answer):
+        vector = normalize_vectors(query_vector)
+        with self._lock:
+            if self.index is None:
+                self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(vector.shape[1]))
+            entry_id = self.next_id
+            self.next_id += 1
+            self.index.add_with_ids(vector, np.array([entry_id], dtype=np.int64))
+            self.entries[entry_id] = {
+                "query": query,
+                "chunk_ids": frozenset(chunk_ids),
+                "fingerprint": chunk_fingerprint(chunk_ids, texts),
+                "answer": answer,
+                "created": time.time(),
+            }
+            if len(self.entries) > self.max_size:
+                self._remove([next(iter(self.entries))], "evicted")
+
+    def invalidate(self, chunk_ids=None):
+        """Drop the entries built on any of `chunk_ids` (all entries if None); returns how many were dropped."""
+        with self._lock:
+            if chunk_ids is None:
+                stale = list(self.entries)
+            else:
+                chunk_ids = set(chunk_ids)
+                stale = [entry_id for entry_id, entry in self.entries.items() if entry["chunk_ids"] & chunk_ids]
+            self._remove(stale, "invalidated")
+            return len(stale)
+
+    def _remove(self, entry_ids, reason):
+        if not entry_ids:
+            return
+        self.index.remove_ids(np.array(entry_ids, dtype=np.int64))
+        for entry_id in entry_ids:
+            del self.entries[entry_id]
+        self.stats[reason] += len(entry_ids)
+
+    def report(self):
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            report = {"size": len(self.entries), "max_size": self.max_size}
+            for key in ("hits", "misses", "stale", "expired", "evicted", "invalidated"):
+                report[key] = self.stats[key]
+            report["hit_rate"] = self.stats["hits"] / lookups if lookups else 0.0
+            return report
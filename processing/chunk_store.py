@@ -0,0 +1,171 @@
+import argparse
+import bisect
+import json
+import mmap
+import os
+import time
+from array import array
+from collections import Counter
+
+import numpy as np
+
+from processing.index_utils import next_chunk_id
+
+CONTENT_FILE = "content.bin"
+OFFSETS_FILE = "offsets.bin"
+REFS_FILE = "refs.bin"
+IDS_FILE = "ids.bin"
+SORTED_IDS_FILE = "ids_sorted.bin"
+ID_ROWS_FILE = "id_rows.bin"
+STRINGS_FILE = "strings.json"
+
+
+def _map(path):
+    """Read-only memory map of a file (an empty bytes object for an empty file, which mmap rejects)."""
+    with open(path, "rb") as f:
+        if not os.fstat(f.fileno()).st_size:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class ChunkStore:
+    """Read-only, memory-mapped chunk store addressed by FAISS id.
+
+    Chunk texts live back to back in one UTF-8 blob (`content.bin`) and `offsets.bin` holds n + 1
+    uint64 byte offsets into it, so chunk i is blob[offsets[i]:offsets[i + 1]]. Titles and URLs
+    repeat for every chunk of an article, so they are interned: `strings.json` lists each one once
+    and `refs.bin` holds a (title, url) pair of uint32 string ids per chunk. Only the pages that
+    are actually read get paged in, so startup time and resident memory stay flat as the corpus grows.
+
+    Every chunk also has a stable 63-bit id (see `processing.index_utils.chunk_id`), which is what
+    an ID-mapped FAISS index returns: `ids.bin` lists them in row order, and a sorted copy with the
+    matching rows lets `row_for_id` find a chunk by binary search over the memory map.
+
+    `store[i]` returns the same {"title", "url", "content"} dict as an entry of football_chunks.json,
+    so it can stand in for the list that `json.load` used to return.
+    """
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        with open(os.path.join(store_dir, STRINGS_FILE), "r", encoding="utf-8") as f:
+            header = json.load(f)
+        self.strings = header["strings"]
+        names = (CONTENT_FILE, OFFSETS_FILE, REFS_FILE, IDS_FILE, SORTED_IDS_FILE, ID_ROWS_FILE)
+        self.maps = [_map(os.path.join(store_dir, name)) for name in names]
+        self.blob = self.maps[0]
+        # memoryview casts index the mapped integers directly, without copying them into Python lists
+        self.offsets = memoryview(self.maps[1]).cast("Q")
+        self.refs = memoryview(self.maps[2]).cast("I")
+        self.ids = memoryview(self.maps[3]).cast("q")
+        self.sorted_ids = memoryview(self.maps[4]).cast("q")
+        self.id_rows = memoryview(self.maps[5]).cast("Q")
+        if len(self) != header["count"] or len(self.blob) != self.offsets[-1]:
+            self.close()
+            raise ValueError(f"Chunk store in {store_dir} is being rebuilt (files from different builds); retry")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def _position(self, i):
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError(f"chunk id {i} out of range for {n} chunks")
+        return i
+
+    def content(self, i):
+        """Text of chunk `i`, decoded straight from the memory map."""
+        i = self._position(i)
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].decode("utf-8")
+
+    def row_for_id(self, chunk_id):
+        """Row of the chunk with this stable id, or None."""
+        pos = bisect.bisect_left(self.sorted_ids, chunk_id)
+        if pos < len(self.sorted_ids) and self.sorted_ids[pos] == chunk_id:
+            return self.id_rows[pos]
+        return None
+
+    def __getitem__(self, i):
+        i = self._position(i)
+        return {
+            "title": self.strings[self.refs[2 * i]],
+            "url": self.strings[self.refs[2 * i + 1]],
+            "content": self.blob[self.offsets[i]:self.offsets[i + 1]].decode("utf-8"),
+        }
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def close(self):
+        for view in (self.offsets, self.refs, self.ids, self.sorted_ids, self.id_rows):
+            view.release()
+        for mapped in self.maps:
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+
+    @staticmethod
+    def build(chunks, store_dir):
+        """Write an iterable of chunk dicts to `store_dir` in one streaming pass; returns the chunk count.
+
+        Every file is written under a temporary name and renamed into place once all of them are
+        complete, the string table last. Processes that already have the store mapped keep reading
+        the old files, and a store opened during the swap is detected by the count check in __init__.
+        """
+        os.makedirs(store_dir, exist_ok=True)
+        strings, string_ids = [], {}
+        offsets, refs, ids = array("Q", [0]), array("I"), array("q")
+        positions = Counter()
+
+        def intern(value):
+            if value not in string_ids:
+                string_ids[value] = len(strings)
+                strings.append(value)
+            return string_ids[value]
+
+        def tmp_path(name):
+            return os.path.join(store_dir, name + ".tmp")
+
+        with open(tmp_path(CONTENT_FILE), "wb") as blob:
+            for chunk in chunks:
+                data = chunk.get("content", "").encode("utf-8")
+                blob.write(data)
+                offsets.append(offsets[-1] + len(data))
+                refs.append(intern(chunk.get("title", "")))
+                refs.append(intern(chunk.get("url", "")))
+                ids.append(next_chunk_id(chunk, positions))
+
+        id_rows = np.argsort(np.frombuffer(ids, dtype=np.int64), kind="stable")
+        sorted_ids = np.frombuffer(ids, dtype=np.int64)[id_rows]
+        for name, values in ((OFFSETS_FILE, offsets), (REFS_FILE, refs), (IDS_FILE, ids)):
+            with open(tmp_path(name), "wb") as f:
+                values.tofile(f)
+        sorted_ids.tofile(tmp_path(SORTED_IDS_FILE))
+        id_rows.astype(np.uint64).tofile(tmp_path(ID_ROWS_FILE))
+        with open(tmp_path(STRINGS_FILE), "w", encoding="utf-8") as f:
+            json.dump({"count": len(offsets) - 1, "strings": strings}, f, ensure_ascii=False)
+        for name in (CONTENT_FILE, OFFSETS_FILE, REFS_FILE, IDS_FILE, SORTED_IDS_FILE, ID_ROWS_FILE, STRINGS_FILE):
+            os.replace(tmp_path(name), os.path.join(store_dir, name))
+        return len(offsets) - 1
+
+
+def load_chunk_store(store_dir, chunked_file):
+    """Open the chunk store if one has been built, otherwise fall back to loading the chunks JSON."""
+    if store_dir and os.path.exists(os.path.join(store_dir, STRINGS_FILE)):
+        return ChunkStore(store_dir)
+    with open(chunked_file, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    from processing.chunking import iter_json_records
+
+    parser = argparse.ArgumentParser(description="Build the memory-mapped chunk store from a chunks JSON/JSONL file.")
+    parser.add_argument("chunked_file", help="football_chunks.json or .jsonl")
+    parser.add_argument("store_dir", help="Directory to write the chunk store to")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    count = ChunkStore.build(iter_json_records(args.chunked_file), args.store_dir)
+    print(f"Chunk store with {count} chunks written to {args.store_dir} in {time.perf_counter() - start:.2f}s")
@@ -1,16 +1,113 @@
+import itertools
 import json
+import os
 import re
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from processing.dedup import ChunkDeduplicator, content_hash
+from processing.text_splitter import RecursiveTextSplitter, TokenBudgetSplitter, load_tokenizer
+
+
+def iter_json_array(f, block_size=1 << 16):
+    """Yield the items of a top-level JSON array one at a time, reading `f` in blocks."""
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = "", 0, False
+
+    def fill(size):
+        nonlocal buffer, pos, eof
+        more = f.read(size)
+        eof = not more
+        buffer, pos = buffer[pos:] + more, 0
+
+    def skip(chars):
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in chars:
+                pos += 1
+            if pos < len(buffer) or eof:
+                return
+            fill(block_size)
+
+    fill(block_size)
+    skip(" \t\r\n")
+    if buffer[pos:pos + 1] != "[":
+        raise ValueError("Expected a JSON array")
+    pos += 1
+    while True:
+        skip(" \t\r\n,")
+        if pos >= len(buffer) or buffer[pos] == "]":
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            fill(max(block_size, len(buffer)))  # item spans the block boundary: read more
+            continue
+        yield item
+        pos = end
+
+
+def iter_json_records(path, on_bad_line=None):
+    """Stream records from a JSON Lines file (.jsonl) or a JSON array file without loading it whole.
+
+    A JSON Lines record that does not parse raises, unless `on_bad_line(line_number, error)` is
+    given, in which case it is reported there and skipped. A broken JSON array always raises.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        if str(path).endswith(".jsonl"):
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    if on_bad_line is None:
+                        raise
+                    on_bad_line(number, e)
+                    continue
+                yield record
+        else:
+            yield from iter_json_array(f)
+
+
+_worker_chunker = None
+
+
+def _init_chunk_worker(text_splitter):
+    global _worker_chunker
+    _worker_chunker = ArticleChunker(None, None, text_splitter=text_splitter)
+
+
+def _chunk_batch(articles):
+    return _worker_chunker.chunk_batch(articles)
+
 
 class ArticleChunker:
-    def __init__(self, json_file, chunked_file, chunk_size=500, chunk_overlap=50):
+    """Splits articles into chunks, by characters (chunk_size/chunk_overlap) or, with chunk_tokens, by model tokens."""
+
+    def __init__(self, json_file, chunked_file, chunk_size=500, chunk_overlap=50, workers=1, batch_size=64,
+                 chunk_tokens=None, token_overlap=0, tokenizer=None, text_splitter=None, dedup=True,
+                 dedup_threshold=0.85):
         self.json_file = json_file
         self.chunked_file = chunked_file
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap
-        )
+        self.workers = workers
+        self.batch_size = batch_size
+        self.dedup = dedup
+        self.dedup_threshold = dedup_threshold
+        self.deduplicator = None
+        self.duplicate_articles = 0
+        self.bad_records = 0
+        if text_splitter is not None:
+            self.text_splitter = text_splitter
+        elif chunk_tokens:
+            self.text_splitter = TokenBudgetSplitter(tokenizer or load_tokenizer(), max_tokens=chunk_tokens,
+                                                     overlap_tokens=token_overlap)
+        else:
+            self.text_splitter = RecursiveTextSplitter(chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap)
 
     @staticmethod
     def clean_text(text):
@@ -18,40 +115,162 @@ class ArticleChunker:
         text = re.sub(r"\s+", " ", text)  # Remove extra spaces/newlines
         return text.strip()
 
-    def load_articles(self):
-        """Load articles from JSON file."""
-        try:
-            with open(self.json_file, "r", encoding="utf-8") as f:
-                articles = json.load(f)
-            return articles if articles else []
-        except Exception as e:
-            print(f"Error loading JSON file: {e}")
-            return []
+    def _skip_bad_line(self, number, error):
+        print(f"⚠️ Skipping line {number} of {self.json_file}: {error}")
+        self.bad_records += 1
 
-    def chunk_articles(self):
-        """Load, clean, split, and save articles into chunks."""
-        articles = self.load_articles()
-        if not articles:
-            print("No articles found in JSON file!")
-            return
+    def iter_articles(self):
+        """Stream articles from the JSON or JSON Lines input, one at a time, skipping repeated content.
+
+        Unparseable JSON Lines records and records that are not objects are skipped and counted in
+        `bad_records`; an unreadable file or a broken JSON array raises.
+        """
+        seen = set()
+        self.duplicate_articles = 0
+        self.bad_records = 0
+        for article in iter_json_records(self.json_file, on_bad_line=self._skip_bad_line):
+            if not isinstance(article, dict):
+                self._skip_bad_line("?", f"expected an object, got {type(article).__name__}")
+                continue
+            if self.dedup:
+                digest = content_hash(article.get("content", ""))
+                if digest in seen:
+                    self.duplicate_articles += 1
+                    continue
+                seen.add(digest)
+            yield article
+
+    def chunk_article(self, article):
+        """Clean and split one article into chunk records."""
+        return self.chunk_batch([article])[0]
 
-        chunked_data = []
-        for article in articles:
+    def chunk_batch(self, articles):
+        """Clean and split a batch of articles; the splitter sees the whole batch so tokenization is batched."""
+        contents = [self.clean_text(article.get("content", "No Content")) for article in articles]
+        batches = []
+        for article, chunks in zip(articles, self.text_splitter.split_texts(contents)):
             title = self.clean_text(article.get("title", "No Title"))
             url = article.get("url", "No URL")
-            content = self.clean_text(article.get("content", "No Content"))
+            batches.append([{"title": title, "url": url, "content": chunk} for chunk in chunks])
+        return batches
 
-            chunks = self.text_splitter.split_text(content)
-            for chunk in chunks:
-                chunked_data.append({"title": title, "url": url, "content": chunk})
+    def iter_batches(self):
+        articles = self.iter_articles()
+        while True:
+            batch = list(itertools.islice(articles, self.batch_size))
+            if not batch:
+                return
+            yield batch
+
+    def iter_chunks(self):
+        """Yield chunk records one at a time, so memory does not grow with the corpus.
+
+        With `dedup` on, chunks whose content exactly or nearly repeats an earlier chunk are
+        dropped here, before they ever reach the embedding model.
+        """
+        chunks = self.iter_chunks_parallel() if self.workers > 1 else self._iter_chunks_serial()
+        if not self.dedup:
+            yield from chunks
+            return
+        self.deduplicator = ChunkDeduplicator(threshold=self.dedup_threshold)
+        for chunk in chunks:
+            if not self.deduplicator.is_duplicate(chunk["content"]):
+                yield chunk
+
+    def _iter_chunks_serial(self):
+        for batch in self.iter_batches():
+            for chunks in self.chunk_batch(batch):
+                yield from chunks
+
+    def dedup_report(self):
+        """Print and return how many duplicate articles and chunks were dropped by the last run."""
+        if not self.dedup or self.deduplicator is None:
+            return None
+        report = {"duplicate_articles": self.duplicate_articles, **self.deduplicator.report()}
+        print(f"Dedup: dropped {report['duplicate_articles']} duplicate articles, {report['exact']} exact and "
+              f"{report['near']} near-duplicate chunks; kept {report['kept']} chunks")
+        return report
+
+    def iter_chunks_parallel(self):
+        """Shard batches of articles across a process pool and yield chunks in input order.
+
+        Batches are submitted through a bounded window and their results are consumed strictly
+        in submission order, so the output is identical to serial mode and memory stays flat.
+        """
+        batches = self.iter_batches()
+        window = deque()
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_chunk_worker,
+                                 initargs=(self.text_splitter,)) as executor:
+            while True:
+                while len(window) < self.workers * 2:
+                    batch = next(batches, None)
+                    if batch is None:
+                        break
+                    window.append(executor.submit(_chunk_batch, batch))
+                if not window:
+                    return
+                for chunks in window.popleft().result():
+                    yield from chunks
+
+    def chunk_articles(self):
+        """Load, clean, split, and save articles into chunks.
+
+        A `.jsonl` chunked_file is written as compact JSON Lines while chunks stream through;
+        any other name keeps the original pretty-printed JSON array.
+        """
+        if str(self.chunked_file).endswith(".jsonl"):
+            return self.chunk_articles_streaming()
 
         try:
-            with open(self.chunked_file, "w", encoding="utf-8") as f:
+            chunked_data = list(self.iter_chunks())
+        except Exception as e:
+            print(f"Error loading JSON file: {e}")  # the previous chunked file is left untouched
+            return
+        if not chunked_data:
+            print("No articles found in JSON file!")
+            return
+
+        tmp_file = f"{self.chunked_file}.tmp"
+        try:
+            with open(tmp_file, "w", encoding="utf-8") as f:
                 json.dump(chunked_data, f, indent=4, ensure_ascii=False)
-            print(f"Chunking completed! Data saved in {self.chunked_file}")
+            os.replace(tmp_file, self.chunked_file)
+            print(f"Chunking completed! Data saved in {self.chunked_file}{self._skipped_note()}")
+            self.dedup_report()
         except Exception as e:
             print(f"Error saving chunked data: {e}")
 
+    def chunk_articles_streaming(self):
+        """Stream articles in and write each chunk as one compact JSON line, in constant memory.
+
+        Chunks go to a temporary file that only replaces `chunked_file` once the whole input has
+        been read, so a failure part-way leaves the previous chunks in place.
+        """
+        count = 0
+        tmp_file = f"{self.chunked_file}.tmp"
+        try:
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                for chunk in self.iter_chunks():
+                    f.write(json.dumps(chunk, ensure_ascii=False, separators=(",", ":")) + "\n")
+                    count += 1
+            if count:
+                os.replace(tmp_file, self.chunked_file)
+        except Exception as e:
+            print(f"Error chunking articles: {e}")
+            return
+        finally:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+        if not count:
+            print("No articles found in JSON file!")
+            return
+        print(f"Chunking completed! {count} chunks streamed to {self.chunked_file}{self._skipped_note()}")
+        self.dedup_report()
+
+    def _skipped_note(self):
+        return f" ({self.bad_records} bad records skipped)" if self.bad_records else ""
+
+
 if __name__ == "__main__":
     json_file = "/home/shtlp_0060/Desktop/Python Data Scrapping Project/data/football_articles/football_articles.json"
     chunked_file = "/home/shtlp_0060/Desktop/Python Data Scrapping Project/data/football_chunks/football_chunks.json"
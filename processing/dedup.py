@@ -0,0 +1,169 @@
+import hashlib
+import re
+from collections import Counter
+
+import numpy as np
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def normalize(text):
+    """Lower-case and collapse whitespace so trivial formatting differences do not defeat the hash."""
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def content_hash(text):
+    return hashlib.blake2b(normalize(text).encode("utf-8"), digest_size=16).digest()
+
+
+class MinHasher:
+    """MinHash signatures over word shingles, computed for all permutations at once with numpy."""
+
+    def __init__(self, num_perm=128, shingle_size=5, seed=1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, _MAX_HASH, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, _MAX_HASH, size=num_perm, dtype=np.uint64)
+
+    def shingles(self, text):
+        words = normalize(text).split()
+        if len(words) <= self.shingle_size:
+            return {" ".join(words)}
+        return {" ".join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)}
+
+    def signature(self, text):
+        hashes = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little")
+             for s in self.shingles(text)),
+            dtype=np.uint64,
+        )
+        # (a * x + b) mod p for every permutation x shingle pair; 32-bit inputs keep it inside uint64
+        permuted = (np.outer(self.a, hashes) + self.b[:, None]) % _MERSENNE_PRIME
+        return (permuted & _MAX_HASH).min(axis=1).astype(np.uint32)
+
+
+class BandIndex:
+    """LSH band hash -> ids of the texts in that bucket, stored compactly.
+
+    Merged entries live in two parallel numpy arrays (uint64 band hashes kept sorted, uint32 ids),
+    12 bytes per band per text, and are looked up with `searchsorted`. New entries go to a small
+    dict first and are merged in once it holds an eighth as many as the arrays, so merges stay
+    rare as the index grows and the dict stays small.
+    """
+
+    MIN_MERGE = 1 << 14
+
+    def __init__(self):
+        self.keys = np.empty(0, dtype=np.uint64)
+        self.ids = np.empty(0, dtype=np.uint32)
+        self.recent = {}
+        self.recent_count = 0
+
+    def lookup(self, keys):
+        """Set of ids sharing at least one of `keys`."""
+        found = set()
+        if len(self.keys):
+            lo = np.searchsorted(self.keys, keys, side="left")
+            hi = np.searchsorted(self.keys, keys, side="right")
+            for start, end in zip(lo[hi > lo], hi[hi > lo]):
+                found.update(self.ids[start:end].tolist())
+        for key in keys.tolist():
+            found.update(self.recent.get(key, ()))
+        return found
+
+    def add(self, keys, text_id):
+        for key in keys.tolist():
+            self.recent.setdefault(key, []).append(text_id)
+        self.recent_count += len(keys)
+        if self.recent_count >= max(self.MIN_MERGE, len(self.keys) // 8):
+            self.merge()
+
+    def merge(self):
+        if not self.recent_count:
+            return
+        keys = np.empty(self.recent_count, dtype=np.uint64)
+        ids = np.empty(self.recent_count, dtype=np.uint32)
+        pos = 0
+        for key, bucket in self.recent.items():
+            keys[pos:pos + len(bucket)] = key
+            ids[pos:pos + len(bucket)] = bucket
+            pos += len(bucket)
+        order = np.argsort(keys, kind="stable")
+        keys, ids = keys[order], ids[order]
+        # Linear merge into the sorted arrays instead of re-sorting everything
+        positions = np.searchsorted(self.keys, keys, side="right")
+        self.keys = np.insert(self.keys, positions, keys)
+        self.ids = np.insert(self.ids, positions, ids)
+        self.recent, self.recent_count = {}, 0
+
+    @property
+    def nbytes(self):
+        return self.keys.nbytes + self.ids.nbytes
+
+
+class ChunkDeduplicator:
+    """Drops exact and near-duplicate texts from a stream, keeping the first occurrence.
+
+    Exact duplicates are caught by a hash of the normalised text. Near duplicates are found with
+    MinHash signatures bucketed by LSH bands: only texts sharing a band are compared, and one is
+    dropped when their estimated Jaccard similarity reaches `threshold`. Everything kept per text
+    is fixed-size (an 8-byte text hash, a uint32 signature row and one 64-bit hash per band in a
+    `BandIndex`), about 1 KB with the defaults, so memory grows slowly with the corpus.
+    """
+
+    def __init__(self, threshold=0.85, num_perm=128, bands=32, shingle_size=5):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm=num_perm, shingle_size=shingle_size)
+        self.hashes = set()
+        self.signatures = np.empty((1024, num_perm), dtype=np.uint32)
+        self.count = 0
+        self.band_index = BandIndex()
+        # Mixes the band number into its hash, so equal rows in different bands never share a bucket
+        self.band_salt = np.arange(1, bands + 1, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+        self.stats = Counter()
+
+    def band_keys(self, signature):
+        """One 64-bit hash per LSH band of `signature`."""
+        rows = signature.reshape(self.bands, self.rows).astype(np.uint64)
+        keys = self.band_salt.copy()
+        for column in rows.T:  # FNV-style fold; uint64 arithmetic wraps around
+            keys = (keys ^ column) * np.uint64(0x100000001B3)
+        return keys
+
+    def check(self, text):
+        """Return "exact" or "near" if `text` duplicates something seen before, else record it and return None."""
+        digest = int.from_bytes(content_hash(text)[:8], "little")
+        if digest in self.hashes:
+            self.stats["exact"] += 1
+            return "exact"
+
+        signature = self.hasher.signature(text)
+        keys = self.band_keys(signature)
+        candidates = self.band_index.lookup(keys)
+        if candidates:
+            rows = self.signatures[np.fromiter(candidates, dtype=np.int64, count=len(candidates))]
+            if (rows == signature).mean(axis=1).max() >= self.threshold:
+                self.stats["near"] += 1
+                return "near"
+
+        self.hashes.add(digest)
+        if self.count == len(self.signatures):
+            self.signatures = np.concatenate([self.signatures, np.empty_like(self.signatures)])
+        self.signatures[self.count] = signature
+        self.band_index.add(keys, self.count)
+        self.count += 1
+        self.stats["kept"] += 1
+        return None
+
+    def is_duplicate(self, text):
+        return self.check(text) is not None
+
+    def report(self):
+        """Counts of kept texts and of exact / near duplicates dropped."""
+        return {"kept": self.stats["kept"], "exact": self.stats["exact"], "near": self.stats["near"]}
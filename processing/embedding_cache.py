@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import re
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, a single writer is assumed
+    fcntl = None
+
+DIGEST_SIZE = 16
+
+
+def text_digest(text):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=DIGEST_SIZE).digest()
+
+
+class EmbeddingCache:
+    """On-disk embedding cache keyed by (model name, content hash).
+
+    Each model gets its own directory holding an append-only float32 matrix (`vectors.f32`,
+    read back through a memory map) and `digests.bin`, the 16-byte content hash of every row in
+    the same order. Vectors are appended before their digests, so a crash mid-write leaves at
+    most some unreferenced rows, which are ignored on the next load.
+
+    Several processes may share one cache directory: appends hold an exclusive lock on `lock`, and
+    `refresh` picks up rows other processes appended since this one last looked.
+    """
+
+    def __init__(self, cache_dir, model_name):
+        self.model_name = model_name
+        self.path = os.path.join(cache_dir, re.sub(r"[^A-Za-z0-9._-]+", "_", model_name))
+        os.makedirs(self.path, exist_ok=True)
+        self.vectors_path = os.path.join(self.path, "vectors.f32")
+        self.digests_path = os.path.join(self.path, "digests.bin")
+        self.meta_path = os.path.join(self.path, "meta.json")
+        self.lock_path = os.path.join(self.path, "lock")
+        self.dim = None
+        self.rows = {}
+        self._loaded = 0  # digest rows read so far
+        self._matrix = None
+        self.refresh()
+
+    def refresh(self):
+        """Read digests appended (by this or another process) since the last call."""
+        if self.dim is None and os.path.exists(self.meta_path):
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                self.dim = json.load(f)["dim"]
+        if self.dim is None or not os.path.exists(self.digests_path):
+            return
+        complete_rows = os.path.getsize(self.vectors_path) // (self.dim * 4) if os.path.exists(self.vectors_path) else 0
+        with open(self.digests_path, "rb") as f:
+            f.seek(self._loaded * DIGEST_SIZE)
+            data = f.read()
+        end = min(self._loaded + len(data) // DIGEST_SIZE, complete_rows)
+        for row in range(self._loaded, end):
+            offset = (row - self._loaded) * DIGEST_SIZE
+            self.rows.setdefault(data[offset:offset + DIGEST_SIZE], row)
+        self._loaded = max(self._loaded, end)
+
+    @contextmanager
+    def _locked(self):
+        with open(self.lock_path, "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def matrix(self):
+        """Memory map over the rows covered by loaded digests (re-opened after appends).
+
+        Only those rows are mapped: the file may end in a torn row, from a crash or from another
+        process that is appending right now, since vectors are written before their digests.
+        """
+        if self._matrix is None or len(self._matrix) < self._loaded:
+            if not self._loaded:
+                return np.empty((0, self.dim or 0), dtype="float32")
+            self._matrix = np.memmap(self.vectors_path, dtype="float32", mode="r", shape=(self._loaded, self.dim))
+        return self._matrix
+
+    def lookup(self, digests):
+        """Cache row for each digest, or -1 where the text has not been embedded with this model."""
+        return np.array([self.rows.get(digest, -1) for digest in digests], dtype=np.int64)
+
+    def get(self, rows):
+        return np.asarray(self.matrix()[rows], dtype="float32")
+
+    def add(self, digests, vectors):
+        """Append vectors for digests not cached yet."""
+        vectors = np.asarray(vectors, dtype="float32")
+        with self._locked():
+            self.refresh()
+            self._append(digests, vectors)
+
+    def _append(self, digests, vectors):
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+            with open(self.meta_path, "w", encoding="utf-8") as f:
+                json.dump({"model": self.model_name, "dim": self.dim}, f)
+        new = {}
+        for i, digest in enumerate(digests):
+            if digest not in self.rows:
+                new.setdefault(digest, i)
+        if not new:
+            return
+        if not os.path.exists(self.vectors_path):
+            open(self.vectors_path, "wb").close()
+        next_row = os.path.getsize(self.vectors_path) // (self.dim * 4)
+        with open(self.vectors_path, "r+b") as f:
+            f.truncate(next_row * self.dim * 4)  # drop a torn partial row before appending
+            f.seek(0, os.SEEK_END)
+            f.write(np.ascontiguousarray(vectors[list(new.values())]).tobytes())
+        written = os.path.getsize(self.digests_path) // DIGEST_SIZE if os.path.exists(self.digests_path) else 0
+        with open(self.digests_path, "r+b" if written else "wb") as f:
+            # rows whose digests were lost in a crash are padded with an all-zero digest to keep rows aligned
+            f.truncate(min(written, next_row) * DIGEST_SIZE)
+            f.seek(0, os.SEEK_END)
+            f.write(b"\0" * DIGEST_SIZE * max(0, next_row - written))
+            for offset, digest in enumerate(new):
+                f.write(digest)
+                self.rows[digest] = next_row + offset
+        self._loaded = next_row + len(new)
@@ -0,0 +1,222 @@
+import hashlib
+import os
+from collections import Counter
+
+import faiss
+import numpy as np
+
+ID_MASK = (1 << 63) - 1  # FAISS ids are signed 64-bit and -1 means "no result"
+METRICS = {"l2": faiss.METRIC_L2, "ip": faiss.METRIC_INNER_PRODUCT}
+# shorthand storage modes for a flat (brute-force) index over compressed vectors
+STORAGE_SPECS = {"fp32": "Flat", "fp16": "SQfp16", "sq8": "SQ8", "pq": "PQ{pq_m}"}
+
+
+def chunk_id(url, position):
+    """Stable id of the `position`-th chunk of the article at `url`."""
+    digest = hashlib.blake2b(f"{url}#{position}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") & ID_MASK
+
+
+def next_chunk_id(chunk, positions):
+    """Id of the next chunk in a stream: an explicit "id" wins, otherwise url + position within its article.
+
+    `positions` is a Counter of the chunks seen so far per URL, updated in place.
+    """
+    url = chunk.get("url", "")
+    position = positions[url]
+    positions[url] += 1
+    return chunk["id"] if "id" in chunk else chunk_id(url, position)
+
+
+def assign_chunk_ids(chunks):
+    """Ids for a sequence of chunk dicts, see `next_chunk_id`."""
+    positions = Counter()
+    return [next_chunk_id(chunk, positions) for chunk in chunks]
+
+
+def resolve_spec(spec, dim):
+    """Expand a storage shorthand ("fp16", "sq8", "pq") into an index_factory spec; other specs pass through.
+
+    "pq" uses one byte per 8 dimensions (PQ48 for 384-d MiniLM vectors), 32x smaller than float32.
+    """
+    return STORAGE_SPECS.get(spec, spec).format(pq_m=max(1, dim // 8))
+
+
+def build_index(spec, dim, training_vectors=None, metric="l2"):
+    """Create an ID-mapped index from a faiss.index_factory spec ("Flat", "HNSW32", "SQ8", "IVF1024,PQ48",
+    "OPQ48,IVF1024,PQ48", ...), training it on `training_vectors` if the spec needs training.
+
+    `metric` is "l2" or "ip" (inner product, i.e. cosine similarity once vectors are normalised).
+    """
+    spec = resolve_spec(spec, dim)
+    index = faiss.index_factory(dim, spec, METRICS[metric])
+    if not index.is_trained:
+        if training_vectors is None or not len(training_vectors):
+            raise ValueError(f"Index spec {spec!r} needs training vectors")
+        index.train(np.ascontiguousarray(training_vectors, dtype="float32"))
+    return faiss.IndexIDMap2(index)
+
+
+def read_index(path, mmap=False):
+    """faiss.read_index, optionally memory-mapping the stored vectors / codes instead of copying them.
+
+    A memory-mapped index is read-only. Its pages live in the OS page cache and are shared by every process
+    that opens the same file, so loading is nearly instant and each worker adds almost no private memory.
+    IO_FLAG_MMAP_IFC (faiss >= 1.11) covers flat, SQ, PQ, HNSW and IVF storage. Older faiss only has
+    IO_FLAG_MMAP, which maps IVF inverted lists and nothing else, so other index types are still copied.
+    """
+    if not mmap:
+        return faiss.read_index(path)
+    flag = getattr(faiss, "IO_FLAG_MMAP_IFC", None)
+    if flag is None:
+        print(f"⚠️ faiss {faiss.__version__} has no IO_FLAG_MMAP_IFC: only IVF lists of {path} are memory-mapped, "
+              f"upgrade to faiss >= 1.11 to map flat, SQ, PQ and HNSW storage.")
+        flag = faiss.IO_FLAG_MMAP
+    try:
+        return faiss.read_index(path, flag)
+    except RuntimeError as e:
+        print(f"⚠️ Could not memory-map {path} ({e}), loading it into memory instead.")
+        return faiss.read_index(path)
+
+
+def write_index(index, path):
+    """faiss.write_index through a temporary file and an atomic rename.
+
+    Processes that memory-mapped the old file keep reading the old inode instead of a half-written one.
+    """
+    tmp_path = f"{path}.tmp"
+    faiss.write_index(index, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def normalize_vectors(vectors):
+    """float32 copy of `vectors` with every row scaled to unit length (all-zero rows stay zero)."""
+    vectors = np.array(vectors, dtype="float32", ndmin=2)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def uses_inner_product(index):
+    return index.metric_type == faiss.METRIC_INNER_PRODUCT
+
+
+def query_vectors(index, vectors):
+    """Query embeddings in the form `index` expects: float32, and unit length for inner-product indexes,
+    so the same retrieval code works against cosine and older L2 indexes."""
+    if uses_inner_product(index):
+        return normalize_vectors(vectors)
+    return np.ascontiguousarray(vectors, dtype="float32")
+
+
+def unwrap_index(index):
+    """The innermost index below any IDMap / pre-transform (OPQ) wrappers."""
+    # the outermost proxy owns every level below it: keep the chain alive as long as the result is used
+    chain = [index]
+    current = faiss.downcast_index(index)
+    while isinstance(current, (faiss.IndexIDMap, faiss.IndexIDMap2, faiss.IndexPreTransform)):
+        chain.append(current)
+        current = faiss.downcast_index(current.index)
+    if len(chain) > 1:
+        current.referenced_objects = chain
+    return current
+
+
+def set_search_params(index, nprobe=None, ef_search=None):
+    """Set query-time knobs on the inner index: IVF lists probed and HNSW search depth.
+
+    Both are stored when the index is written, so serving processes pick them up on load.
+    """
+    inner = unwrap_index(index)
+    if nprobe is not None and isinstance(inner, faiss.IndexIVF):
+        inner.nprobe = nprobe
+    if ef_search is not None and hasattr(inner, "hnsw"):
+        inner.hnsw.efSearch = ef_search
+    return index
+
+
+def has_exact_vectors(index):
+    """True when the index stores full float32 vectors, so re-scoring its results cannot change them."""
+    return isinstance(unwrap_index(index), (faiss.IndexFlat, faiss.IndexHNSWFlat, faiss.IndexIVFFlat))
+
+
+def supports_removal(index):
+    return not hasattr(unwrap_index(index), "hnsw")
+
+
+def index_bytes(index):
+    return len(faiss.serialize_index(index))
+
+
+def is_id_mapped(index):
+    return isinstance(faiss.downcast_index(index), (faiss.IndexIDMap, faiss.IndexIDMap2))
+
+
+def index_ids(index):
+    """All ids stored in an IndexIDMap/IndexIDMap2 (positions 0..n-1 for a plain index)."""
+    index = faiss.downcast_index(index)
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        return faiss.vector_to_array(index.id_map).astype(np.int64)
+    return np.arange(index.ntotal, dtype=np.int64)
+
+
+class ChunkLookup:
+    """Resolves FAISS search results to chunk dicts.
+
+    Indexes built with stable ids return chunk ids, which are looked up through the chunk store
+    (or an id -> row map built once from the JSON list). Older plain indexes return row
+    positions, which are used as they are.
+    """
+
+    def __init__(self, chunks, index):
+        self.chunks = chunks
+        self.index = index
+        self._rows = None
+
+    def row(self, i):
+        """Row of chunk id `i` in `chunks`, or None if it is unknown."""
+        if self._rows is None:
+            if not is_id_mapped(self.index):
+                self._rows = False
+            elif hasattr(self.chunks, "row_for_id"):
+                self._rows = self.chunks.row_for_id
+            else:
+                self._rows = {chunk: row for row, chunk in enumerate(assign_chunk_ids(self.chunks))}.get
+        if self._rows is False:
+            return i if 0 <= i < len(self.chunks) else None
+        return self._rows(int(i))
+
+    def resolve_ids(self, ids):
+        """(ids, chunk dicts) for the ids that resolve to a chunk, in their original order."""
+        kept, chunks = [], []
+        for i in ids:
+            row = self.row(i) if i >= 0 else None
+            if row is not None:
+                kept.append(int(i))
+                chunks.append(self.chunks[row])
+        return kept, chunks
+
+    def resolve(self, ids):
+        return self.resolve_ids(ids)[1]
+
+    def contents(self, ids):
+        return [chunk["content"] for chunk in self.resolve(ids)]
+
+
+def check_consistency(index, chunks):
+    """Compare the ids in `index` with the ids of `chunks`; returns a report with an "ok" flag."""
+    in_index = set(index_ids(index).tolist())
+    if hasattr(chunks, "ids"):
+        expected = set(chunks.ids)
+    elif is_id_mapped(index):
+        expected = set(assign_chunk_ids(chunks))
+    else:
+        expected = set(range(len(chunks)))
+    report = {
+        "index_vectors": int(index.ntotal),
+        "chunks": len(chunks),
+        "missing_from_index": len(expected - in_index),
+        "unknown_in_index": len(in_index - expected),
+        "duplicate_ids": int(index.ntotal) - len(in_index),
+    }
+    report["ok"] = not (report["missing_from_index"] or report["unknown_in_index"] or report["duplicate_ids"])
+    return report
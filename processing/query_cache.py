@@ -0,0 +1,132 @@
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+
+import numpy as np
+
+from processing.embedding_cache import EmbeddingCache, text_digest
+
+
+def normalize_query(query, lowercase=True):
+    """Cache key for a query: whitespace collapsed and, for uncased models such as MiniLM, lower-cased.
+
+    Both leave the model's tokens unchanged, so "Who won the match?" and " who won  the MATCH?" share an entry.
+    """
+    query = re.sub(r"\s+", " ", query).strip()
+    return query.lower() if lowercase else query
+
+
+class QueryEmbeddingCache:
+    """LRU cache of query embeddings with a size bound and a time-to-live.
+
+    Entries are keyed on the normalised query text. With `cache_dir`, misses also fall back to an
+    on-disk `EmbeddingCache` that several processes (Streamlit workers, the CLI, evaluation runs)
+    can share, so a question embedded by one of them is not re-encoded by the others. `stats` counts
+    memory hits, disk hits, misses, expired and evicted entries and failed disk reads or writes; `report()` adds the size and hit rate.
+    """
+
+    def __init__(self, model_name, max_size=1024, ttl=3600, cache_dir=None, lowercase=True):
+        self.model_name = model_name
+        self.max_size = max_size
+        self.ttl = ttl
+        self.lowercase = lowercase
+        self.entries = OrderedDict()  # key -> (expires_at, vector)
+        self.disk = EmbeddingCache(cache_dir, f"queries-{model_name}") if cache_dir else None
+        self.stats = Counter()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def key(self, query):
+        return normalize_query(query, self.lowercase)
+
+    def get(self, key):
+        """Cached vector for a normalised key, or None."""
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if entry[0] >= time.monotonic():
+                    self.entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return entry[1]
+                del self.entries[key]
+                self.stats["expired"] += 1
+        if self.disk is not None:
+            vector = self._disk_get(key)
+            if vector is not None:
+                self._remember(key, vector)
+                with self._lock:
+                    self.stats["disk_hits"] += 1
+                return vector
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def _disk_get(self, key):
+        """Vector from the shared disk tier, or None. A failing read is a miss, never a failed query."""
+        try:
+            digest = text_digest(key)
+            row = self.disk.lookup([digest])[0]
+            if row < 0:
+                self.disk.refresh()
+                row = self.disk.lookup([digest])[0]
+            return self.disk.get([row])[0] if row >= 0 else None
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Query cache disk read failed, encoding instead: {e}")
+            with self._lock:
+                self.stats["disk_errors"] += 1
+            return None
+
+    def put(self, keys, vectors):
+        vectors = np.asarray(vectors, dtype="float32")
+        for key, vector in zip(keys, vectors):
+            self._remember(key, vector)
+        if self.disk is not None and len(keys):
+            try:
+                self.disk.add([text_digest(key) for key in keys], vectors)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Query cache disk write failed: {e}")
+                with self._lock:
+                    self.stats["disk_errors"] += 1
+
+    def _remember(self, key, vector):
+        with self._lock:
+            self.entries[key] = (time.monotonic() + self.ttl, vector)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.stats["evicted"] += 1
+
+    def encode(self, queries, encode_fn):
+        """Embeddings of `queries` (one row each); `encode_fn` is called once, on the distinct uncached keys."""
+        keys = [self.key(query) for query in queries]
+        found = {}
+        for key in dict.fromkeys(keys):
+            vector = self.get(key)
+            if vector is not None:
+                found[key] = vector
+        missing = [key for key in dict.fromkeys(keys) if key not in found]
+        if missing:
+            vectors = np.asarray(encode_fn(missing), dtype="float32")
+            self.put(missing, vectors)
+            found.update(zip(missing, vectors))
+        return np.array([found[key] for key in keys], dtype="float32")
+
+    def report(self):
+        """Counters plus current size and overall hit rate, for sizing `max_size` / `ttl`."""
+        with self._lock:
+            hits = self.stats["hits"] + self.stats["disk_hits"]
+            lookups = hits + self.stats["misses"]  # an expired entry ends up as a disk hit or a miss
+            return {
+                "size": len(self.entries),
+                "max_size": self.max_size,
+                "hits": self.stats["hits"],
+                "disk_hits": self.stats["disk_hits"],
+                "misses": self.stats["misses"],
+                "expired": self.stats["expired"],
+                "evicted": self.stats["evicted"],
+                "disk_errors": self.stats["disk_errors"],
+                "hit_rate": hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,78 @@
+import os
+
+import numpy as np
+
+from processing.index_utils import has_exact_vectors, normalize_vectors, uses_inner_product
+
+
+class ExactReranker:
+    """Re-scores the candidates of a compressed index (fp16 / SQ8 / PQ) with full-precision vectors.
+
+    The vectors come from the indexer's `.vectors.npy` file, opened as a memory map: only the rows
+    of the candidates being re-scored are read, so serving processes keep just the compressed index
+    in memory. Row i of that file belongs to the i-th id in the index manifest.
+    """
+
+    def __init__(self, vectors_file, manifest_file, factor=4):
+        self.vectors = np.load(vectors_file, mmap_mode="r")
+        with np.load(manifest_file) as manifest:
+            ids = manifest["ids"]
+        if len(ids) != len(self.vectors):
+            raise ValueError(f"{vectors_file} has {len(self.vectors)} rows but the manifest lists {len(ids)} ids")
+        self.id_rows = np.argsort(ids, kind="stable")
+        self.sorted_ids = ids[self.id_rows]
+        self.factor = factor
+
+    def rows(self, ids):
+        """Row of each id in the vectors file, or -1 if it is unknown."""
+        ids = np.asarray(ids, dtype=np.int64)
+        if not len(self.sorted_ids):
+            return np.full(len(ids), -1, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self.sorted_ids, ids), len(self.sorted_ids) - 1)
+        return np.where(self.sorted_ids[pos] == ids, self.id_rows[pos], -1)
+
+    def search(self, index, queries, top_k):
+        """index.search over `factor` x `top_k` candidates, re-ranked exactly; same (distances, ids) shape."""
+        distances, ids = index.search(queries, top_k * self.factor)
+        out_distances = np.full((len(queries), top_k), -1, dtype="float32")
+        out_ids = np.full((len(queries), top_k), -1, dtype=np.int64)
+        for q, (query, candidates) in enumerate(zip(queries, ids)):
+            candidates = candidates[candidates >= 0]
+            rows = self.rows(candidates)
+            if (rows < 0).any():  # index and vectors file disagree: keep the ANN order
+                n = min(top_k, len(candidates))
+                out_distances[q, :n] = distances[q][:n]
+                out_ids[q, :n] = candidates[:n]
+                continue
+            order = np.argsort(rows)  # read the memory map in file order
+            vectors = np.empty((len(rows), self.vectors.shape[1]), dtype="float32")
+            vectors[order] = self.vectors[rows[order]]
+            if uses_inner_product(index):
+                scores = normalize_vectors(vectors) @ query
+                best = np.argsort(-scores, kind="stable")[:top_k]
+            else:
+                scores = ((vectors - query) ** 2).sum(axis=1)
+                best = np.argsort(scores, kind="stable")[:top_k]
+            out_distances[q, :len(best)] = scores[best]
+            out_ids[q, :len(best)] = candidates[best]
+        return out_distances, out_ids
+
+
+def load_reranker(index, vector_db_path, factor=4):
+    """An ExactReranker for the index saved at `vector_db_path`, or None when re-ranking cannot help
+    (the index holds exact vectors, `factor` is 0, or the vectors file / manifest are missing or stale)."""
+    vectors_file, manifest_file = f"{vector_db_path}.vectors.npy", f"{vector_db_path}.manifest.npz"
+    if not factor or not (os.path.exists(vectors_file) and os.path.exists(manifest_file)) or has_exact_vectors(index):
+        return None
+    try:
+        return ExactReranker(vectors_file, manifest_file, factor=factor)
+    except Exception as e:
+        print(f"⚠️ Exact re-ranking disabled: {e}")
+        return None
+
+
+def search_index(index, queries, top_k, reranker=None):
+    """Search `index`, re-ranking the candidates exactly when a reranker is given."""
+    if reranker is None:
+        return index.search(queries, top_k)
+    return reranker.search(index, queries, top_k)
@@ -1,14 +1,22 @@
 import os
-import faiss
-import numpy as np
 import json
 import datetime
 from sentence_transformers import SentenceTransformer
 from openai import OpenAI
+from processing.chunk_store import load_chunk_store
+from processing.index_utils import read_index
+from processing.query_cache import QueryEmbeddingCache
+from processing.retrieval_engine import RetrievalEngine
 
 class FootballQnA:
     VECTOR_DB_PATH = "/home/shtlp_0060/Desktop/Python Data Scrapping Project/data/faiss/faiss_index"
     CHUNKED_FILE = "/home/shtlp_0060/Desktop/Python Data Scrapping Project/data/football_chunks/football_chunks.json"
+    CHUNK_STORE_DIR = "/home/shtlp_0060/Desktop/Python Data Scrapping Project/data/football_chunks/chunk_store"
+    MMAP_INDEX = True  # share one page-cache copy of the index between processes instead of a heap copy each
+    RERANK_FACTOR = 4  # candidates re-scored per result when the index stores compressed vectors (0 = off)
+    QUERY_CACHE_SIZE = 1024  # query embeddings kept in memory (0 = off)
+    QUERY_CACHE_TTL = 3600  # seconds
+    QUERY_CACHE_DIR = None  # optional on-disk query embedding cache shared by all processes
     LOG_FILE = "/home/shtlp_0060/Desktop/Python Data Scrapping Project/data/QnA_logs/qna_logs.json"
     
     def __init__(self):
@@ -17,24 +25,27 @@ class FootballQnA:
         self.embeddings_model = SentenceTransformer("all-MiniLM-L6-v2")
         self.index = self.load_faiss_index()
         self.chunks = self.load_chunks()
+        self.query_cache = QueryEmbeddingCache("all-MiniLM-L6-v2", self.QUERY_CACHE_SIZE, self.QUERY_CACHE_TTL,
+                                               self.QUERY_CACHE_DIR) if self.QUERY_CACHE_SIZE else None
+        self.engine = RetrievalEngine(self.embeddings_model, self.index, self.chunks,
+                                      vector_db_path=self.VECTOR_DB_PATH, rerank_factor=self.RERANK_FACTOR,
+                                      query_cache=self.query_cache)
     
     def load_faiss_index(self):
         """Load the FAISS index."""
-        return faiss.read_index(self.VECTOR_DB_PATH)
+        return read_index(self.VECTOR_DB_PATH, mmap=self.MMAP_INDEX)
     
     def load_chunks(self):
-        """Load chunked articles from JSON."""
-        with open(self.CHUNKED_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
+        """Load chunked articles from the memory-mapped chunk store, or from JSON if it has not been built."""
+        return load_chunk_store(self.CHUNK_STORE_DIR, self.CHUNKED_FILE)
     
     
     def get_relevant_chunks(self, query, top_k=3):
         """Retrieve the top_k most relevant chunks from FAISS based on the query."""
-        query_vector = self.embeddings_model.encode([query]).astype("float32")
-        distances, indices = self.index.search(query_vector, top_k)
+        distances, indices = self.engine.search_vectors(self.engine.encode([query]), top_k)
         print(f"\nindices: {indices}")
         print(f"\ndistances: {distances}")
-        return [self.chunks[i]["content"] for i in indices[0] if i < len(self.chunks)]
+        return self.engine.chunk_lookup.contents(indices[0])
     
     
     
@@ -93,6 +104,8 @@ You are an expert in football. Answer the following question **ONLY using the pr
         while True:
             user_query = input("Ask a football-related question (or type 'exit' to quit): ")
             if user_query.lower() == "exit":
+                if self.query_cache is not None:
+                    print(f"Query cache: {self.query_cache.report()}")
                 break
             print(f"\nAnswer: {self.generate_answer(user_query)}\n")
 
@@ -0,0 +1,112 @@
+import threading
+
+import numpy as np
+
+from processing.index_utils import ChunkLookup, query_vectors
+from processing.rerank import load_reranker, search_index
+
+
+class _Request:
+    def __init__(self, query, k):
+        self.query = query
+        self.k = k
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class RetrievalEngine:
+    """Query embedding, FAISS search and chunk lookup shared by the CLI, the Streamlit app and the evaluator.
+
+    `search_batch` encodes all queries in one model call and runs one FAISS search over the whole
+    query matrix. `search` answers a single query, but calls arriving from several threads at once
+    (concurrent Streamlit sessions) are coalesced: whichever thread finds the engine idle runs
+    `search_batch` for every query queued so far and keeps going until the queue is empty, while
+    the others wait for their result. With a `QueryEmbeddingCache`, repeated questions skip the model.
+    """
+
+    def __init__(self, embeddings_model, index, chunks, vector_db_path=None, rerank_factor=4, batch_size=64,
+                 query_cache=None):
+        self.embeddings_model = embeddings_model
+        self.query_cache = query_cache
+        self.index = index
+        self.chunks = chunks
+        self.batch_size = batch_size
+        self.chunk_lookup = ChunkLookup(chunks, index)
+        self.reranker = load_reranker(index, vector_db_path, rerank_factor) if vector_db_path else None
+        self._lock = threading.Lock()
+        self._pending = []
+        self._running = False
+
+    def encode(self, queries):
+        """Query embeddings for `queries`, in one model call, prepared for the index metric."""
+        def encode(texts):
+            return self.embeddings_model.encode(list(texts), batch_size=self.batch_size)
+
+        if self.query_cache is not None:
+            return query_vectors(self.index, self.query_cache.encode(queries, encode))
+        return query_vectors(self.index, encode(queries))
+
+    def search_vectors(self, vectors, k):
+        """(distances, ids) for a matrix of query vectors, re-ranked exactly for compressed indexes."""
+        return search_index(self.index, vectors, k, self.reranker)
+
+    def retrieve_batch(self, queries, k=3):
+        """(query vectors, chunk ids per query, chunk texts per query) for the top `k` chunks of every query."""
+        if not queries:
+            return np.zeros((0, 0), dtype="float32"), [], []
+        vectors = self.encode(queries)
+        _, found = self.search_vectors(vectors, k)
+        ids, texts = [], []
+        for row in found:
+            row_ids, chunks = self.chunk_lookup.resolve_ids(row)
+            ids.append(row_ids)
+            texts.append([chunk["content"] for chunk in chunks])
+        return vectors, ids, texts
+
+    def search_batch(self, queries, k=3):
+        """Texts of the top `k` chunks for every query in `queries`."""
+        return self.retrieve_batch(queries, k)[2]
+
+    def search(self, query, k=3):
+        """Texts of the top `k` chunks for one query, batched with any concurrent callers."""
+        return self.retrieve(query, k)[2]
+
+    def retrieve(self, query, k=3):
+        """(query vector, chunk ids, chunk texts) for one query, batched with any concurrent callers."""
+        request = _Request(query, k)
+        with self._lock:
+            self._pending.append(request)
+            if self._running:
+                leader = False
+            else:
+                leader = self._running = True
+        if leader:
+            try:
+                self._drain()
+            except BaseException:
+                with self._lock:
+                    self._running = False
+                raise
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _drain(self):
+        while True:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                if not batch:
+                    self._running = False
+                    return
+            try:
+                vectors, ids, texts = self.retrieve_batch([r.query for r in batch], max(r.k for r in batch))
+                for request, vector, row_ids, row_texts in zip(batch, vectors, ids, texts):
+                    request.result = (vector, row_ids[:request.k], row_texts[:request.k])
+            except Exception as e:
+                for request in batch:
+                    request.error = e
+            finally:
+                for request in batch:
+                    request.done.set()
@@ -0,0 +1,184 @@
+import re
+from itertools import accumulate
+
+
+class RecursiveTextSplitter:
+    """Dependency-free drop-in for LangChain's RecursiveCharacterTextSplitter.
+
+    Produces the same chunks as `RecursiveCharacterTextSplitter(chunk_size, chunk_overlap)` with
+    its defaults (separators kept at the start of the following piece, whitespace stripped,
+    length measured in characters). Pieces are tracked as offsets into the original text, so no
+    intermediate strings are concatenated; only the final chunks are sliced out.
+    """
+
+    DEFAULT_SEPARATORS = ["\n\n", "\n", " ", ""]
+
+    def __init__(self, chunk_size=500, chunk_overlap=50, separators=None):
+        if chunk_size <= 0:
+            raise ValueError(f"chunk_size must be > 0, got {chunk_size}")
+        if not 0 <= chunk_overlap <= chunk_size:
+            raise ValueError(f"chunk_overlap must be between 0 and chunk_size, got {chunk_overlap}")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = list(separators or self.DEFAULT_SEPARATORS)
+
+    def split_text(self, text):
+        """Split `text` into chunks of at most `chunk_size` characters (where separators allow)."""
+        chunks = []
+        self._split(text, 0, len(text), self.separators, chunks)
+        return chunks
+
+    def split_texts(self, texts):
+        return [self.split_text(text) for text in texts]
+
+    @staticmethod
+    def _boundaries(text, start, end, separator):
+        """Start offsets of the pieces of text[start:end] (each piece begins with its separator), plus `end`.
+
+        The offsets come from the part lengths of a single C-level `str.split`, accumulated in
+        C as well, so no per-piece string is kept and no Python-level search loop runs.
+        """
+        if not separator:
+            return list(range(start, end + 1))
+        parts = text[start:end].split(separator)
+        step = len(separator)
+        lengths = [step + len(part) for part in parts[1:]]
+        lengths[0:0] = [start + len(parts[0])]
+        bounds = list(accumulate(lengths))
+        if bounds[0] == start:
+            # the text opens with the separator: the empty leading piece is dropped
+            return bounds
+        return [start] + bounds
+
+    def _split(self, text, start, end, separators, chunks):
+        separator, remaining = separators[-1], []
+        for i, candidate in enumerate(separators):
+            if candidate == "":
+                separator = candidate
+                break
+            if text.find(candidate, start, end) != -1:
+                separator, remaining = candidate, separators[i + 1:]
+                break
+
+        bounds = self._boundaries(text, start, end, separator)
+        good = 0  # index into `bounds` of the first piece not merged yet
+        for i in range(len(bounds) - 1):
+            piece_start, piece_end = bounds[i], bounds[i + 1]
+            if piece_end - piece_start < self.chunk_size:
+                continue
+            if good < i:
+                self._merge(text, bounds[good:i + 1], chunks)
+            good = i + 1
+            if remaining:
+                self._split(text, piece_start, piece_end, remaining, chunks)
+            else:
+                chunks.append(text[piece_start:piece_end])
+        if good < len(bounds) - 1:
+            self._merge(text, bounds[good:], chunks)
+
+    def _merge(self, text, bounds, chunks):
+        """Greedily pack consecutive pieces into chunks, carrying up to `chunk_overlap` characters over.
+
+        Pieces are contiguous, so a piece is just two neighbouring `bounds` and the current window
+        is a range of them whose length is the distance between its ends.
+        """
+        size, overlap = self.chunk_size, self.chunk_overlap
+        first = 0
+        window_start = window_end = None
+        for i in range(len(bounds) - 1):
+            piece_end = bounds[i + 1]
+            if window_start is not None and piece_end - window_start > size:
+                self._emit(text, window_start, window_end, chunks)
+                while first < i and (window_end - bounds[first] > overlap or piece_end - bounds[first] > size):
+                    first += 1
+                window_start = bounds[first] if first < i else None
+            if window_start is None:
+                window_start = bounds[i]
+            window_end = piece_end
+        if window_start is not None:
+            self._emit(text, window_start, window_end, chunks)
+
+    @staticmethod
+    def _emit(text, start, end, chunks):
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+
+
+def load_tokenizer(model_name="all-MiniLM-L6-v2"):
+    """Load the fast (Rust) tokenizer that belongs to a sentence-transformers embedding model."""
+    from transformers import AutoTokenizer
+
+    if "/" not in model_name:
+        model_name = f"sentence-transformers/{model_name}"
+    return AutoTokenizer.from_pretrained(model_name, use_fast=True)
+
+
+class TokenBudgetSplitter:
+    """Packs whole sentences into chunks that fit the embedding model's token window.
+
+    Token counts come from the model's own tokenizer, so a chunk is never truncated at
+    embedding time and chunks are filled close to the budget instead of being cut at an
+    arbitrary character count. `max_tokens` is the model's sequence length (256 for
+    all-MiniLM-L6-v2); the special tokens the model adds ([CLS]/[SEP]) are taken off it.
+    All sentences of a batch of texts are tokenized in a single call. A sentence longer
+    than the budget is cut at token boundaries using the tokenizer's offset mapping.
+    """
+
+    SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+    def __init__(self, tokenizer, max_tokens=256, overlap_tokens=0):
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens
+        self.budget = max_tokens - tokenizer.num_special_tokens_to_add(pair=False)
+        if self.budget <= 0:
+            raise ValueError(f"max_tokens={max_tokens} leaves no room next to the special tokens")
+        if not 0 <= overlap_tokens < self.budget:
+            raise ValueError(f"overlap_tokens must be between 0 and {self.budget - 1}, got {overlap_tokens}")
+        self.overlap_tokens = overlap_tokens
+
+    def split_sentences(self, text):
+        return [sentence for sentence in self.SENTENCE_END.split(text.strip()) if sentence]
+
+    def split_text(self, text):
+        return self.split_texts([text])[0]
+
+    def split_texts(self, texts):
+        """Split each text into token-budgeted chunks, tokenizing every sentence of the batch at once."""
+        sentences = [self.split_sentences(text) for text in texts]
+        flat = [sentence for group in sentences for sentence in group]
+        if not flat:
+            return [[] for _ in texts]
+        encoded = self.tokenizer(flat, add_special_tokens=False, return_offsets_mapping=True)
+        offsets = iter(encoded["offset_mapping"])
+        return [self._pack([(sentence, next(offsets)) for sentence in group]) for group in sentences]
+
+    def _pieces(self, sentence, offsets):
+        """Yield (text, token count) for a sentence, cutting it at token boundaries if it is over budget."""
+        if len(offsets) <= self.budget:
+            yield sentence, len(offsets)
+            return
+        for i in range(0, len(offsets), self.budget):
+            window = offsets[i:i + self.budget]
+            yield sentence[window[0][0]:window[-1][1]], len(window)
+
+    def _pack(self, sentences):
+        chunks = []
+        current, total = [], 0
+        for sentence, offsets in sentences:
+            for piece, count in self._pieces(sentence, offsets):
+                if current and total + count > self.budget:
+                    chunks.append(" ".join(text for text, _ in current))
+                    # carry trailing sentences over as overlap, as long as they leave room for this one
+                    carried, carried_total = [], 0
+                    for text, n in reversed(current):
+                        if carried_total + n > self.overlap_tokens or carried_total + n + count > self.budget:
+                            break
+                        carried.insert(0, (text, n))
+                        carried_total += n
+                    current, total = carried, carried_total
+                current.append((piece, count))
+                total += count
+        if current:
+            chunks.append(" ".join(text for text, _ in current))
+        return chunks
@@ -5,56 +5,309 @@ import numpy as np
 from langchain.embeddings import OpenAIEmbeddings
 from langchain.vectorstores import FAISS
 from sentence_transformers import SentenceTransformer
+from processing.chunking import iter_json_records
+from processing.embedding_cache import EmbeddingCache, text_digest
+from processing.index_utils import (METRICS, assign_chunk_ids, build_index, check_consistency, is_id_mapped,
+                                    normalize_vectors, read_index, resolve_spec, set_search_params, supports_removal,
+                                    write_index)
 
 class FAISSIndexer:
     """Class to handle FAISS indexing for document embeddings."""
+
+    MODEL_NAME = "all-MiniLM-L6-v2"
     
-    def __init__(self, chunked_file, vector_db_path, use_openai=False):
+    def __init__(self, chunked_file, vector_db_path, use_openai=False, batch_size=64, workers=1,
+                 vectors_file=None, vector_dtype="float32", write_batch=4096, cache_dir=None,
+                 index_spec="Flat", train_size=100_000, nprobe=None, ef_search=None, metric="ip"):
         self.chunked_file = chunked_file
         self.vector_db_path = vector_db_path
         self.use_openai = use_openai
+        self.batch_size = batch_size
+        self.workers = workers or os.cpu_count()
+        self.vectors_file = vectors_file or f"{vector_db_path}.vectors.npy"
+        self.vector_dtype = np.dtype(vector_dtype)
+        self.write_batch = write_batch
         
         if self.use_openai:
             self.embeddings = OpenAIEmbeddings()
+            self.model_name = f"openai-{getattr(self.embeddings, 'model', 'embeddings')}"
         else:
-            self.embeddings_model = SentenceTransformer("all-MiniLM-L6-v2")
+            self.embeddings_model = SentenceTransformer(self.MODEL_NAME)
+            self.model_name = self.MODEL_NAME
             print(f"Embeddings model loaded: {self.embeddings_model}")
+        self.cache = EmbeddingCache(cache_dir, self.model_name) if cache_dir else None
+        self.manifest_file = f"{vector_db_path}.manifest.npz"
+        self.index_spec = index_spec
+        self.train_size = train_size
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric {metric!r}, expected one of {sorted(METRICS)}")
+        self.metric = metric
 
-    def load_chunks(self):
-        """Load chunked articles from JSON file."""
+    def load_chunks(self, strict=False):
+        """Load chunked articles from a JSON or JSON Lines file (errors are re-raised when `strict`)."""
         try:
+            if str(self.chunked_file).endswith(".jsonl"):
+                return list(iter_json_records(self.chunked_file))
             with open(self.chunked_file, "r", encoding="utf-8") as f:
                 return json.load(f)
         except Exception as e:
+            if strict:
+                raise
             print(f"Error loading chunks: {e}")
             return []
 
+    def embed_batches(self, texts):
+        """Yield (positions, vectors) for `texts` in blocks of `write_batch`, longest texts first.
+
+        Sorting by length keeps texts of similar size in the same model batch, so little compute
+        is spent on padding. With `workers` > 1 each block is spread over a pool of CPU processes.
+        """
+        if not texts:
+            return
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        pool = None
+        if not self.use_openai and self.workers > 1:
+            pool = self.embeddings_model.start_multi_process_pool(target_devices=["cpu"] * self.workers)
+        try:
+            for start in range(0, len(order), self.write_batch):
+                positions = order[start:start + self.write_batch]
+                block = [texts[i] for i in positions]
+                if self.use_openai:
+                    vectors = self.embeddings.embed_documents(block)
+                elif pool is not None:
+                    vectors = self.embeddings_model.encode_multi_process(
+                        block, pool, batch_size=self.batch_size,
+                        chunk_size=max(1, -(-len(block) // (self.workers * 4))))
+                else:
+                    vectors = self.embeddings_model.encode(block, batch_size=self.batch_size)
+                yield positions, np.asarray(vectors, dtype="float32")
+        finally:
+            if pool is not None:
+                self.embeddings_model.stop_multi_process_pool(pool)
+
+    def embed_cached(self, texts):
+        """Yield (positions, vectors) for `texts`, running the model only on texts missing from the cache.
+
+        Cached vectors are yielded in blocks of `write_batch`; freshly embedded ones are added to the cache.
+        """
+        digests = [text_digest(text) for text in texts] if self.cache is not None else None
+        cached = self.cache.lookup(digests) if self.cache is not None else np.full(len(texts), -1)
+        missing = np.flatnonzero(cached < 0)
+        hits = np.flatnonzero(cached >= 0)
+
+        done = 0
+        for positions, block in self.embed_batches([texts[i] for i in missing]):
+            positions = missing[positions]
+            if self.cache is not None:
+                self.cache.add([digests[i] for i in positions], block)
+            done += len(positions)
+            print(f"Embedded {done}/{len(missing)} new chunks")
+            yield positions, block
+
+        for start in range(0, len(hits), self.write_batch):
+            positions = hits[start:start + self.write_batch]
+            yield positions, self.cache.get(cached[positions])
+        if len(hits):
+            print(f"Reused {len(hits)} cached embeddings, embedded {len(missing)} new chunks")
+
+    def embed_to_memmap(self, texts):
+        """Embed `texts` into a memory-mapped .npy file (row i = texts[i]) and return it (None if `texts` is empty).
+
+        The file is written under a temporary name and renamed into place, so readers that have the
+        previous one mapped (the exact reranker) never see it half-written.
+        """
+        if not texts:
+            # nothing to embed, and the dimension is unknown: a stale file would disagree with the manifest
+            if os.path.exists(self.vectors_file):
+                os.remove(self.vectors_file)
+            return None
+        tmp_file = f"{self.vectors_file}.tmp"
+        vectors = None
+        for positions, block in self.embed_cached(texts):
+            if vectors is None:
+                vectors = np.lib.format.open_memmap(tmp_file, mode="w+", dtype=self.vector_dtype,
+                                                    shape=(len(texts), block.shape[1]))
+            vectors[positions] = block
+        vectors.flush()
+        os.replace(tmp_file, self.vectors_file)
+        return vectors
+
+    def embed(self, texts):
+        """Embed a (small) list of texts in memory, through the cache like `embed_to_memmap`."""
+        vectors = None
+        for positions, block in self.embed_cached(texts):
+            if vectors is None:
+                vectors = np.zeros((len(texts), block.shape[1]), dtype="float32")
+            vectors[positions] = block
+        return vectors
+
+    def index_vectors(self, vectors):
+        """Vectors as they go into the index: L2-normalised for the inner-product (cosine) metric.
+
+        The cache and the vectors file keep the raw model output, so switching metric needs no re-embedding.
+        """
+        if self.metric == "ip":
+            return normalize_vectors(vectors)
+        return np.ascontiguousarray(vectors, dtype="float32")
+
+    def save_manifest(self, ids, digests):
+        """Record the content digest of every indexed chunk id, so updates can spot changed chunks."""
+        with open(self.manifest_file, "wb") as f:
+            digests = np.frombuffer(b"".join(digests), dtype=np.uint8).reshape(-1, 16)
+            np.savez(f, ids=np.asarray(ids, dtype=np.int64), digests=digests)
+
+    def load_manifest(self):
+        if not os.path.exists(self.manifest_file):
+            return {}
+        with np.load(self.manifest_file) as manifest:
+            return dict(zip(manifest["ids"].tolist(), (row.tobytes() for row in manifest["digests"])))
+
     def create_faiss_index(self):
-        """Convert text chunks into embeddings and store in FAISS."""
+        """Convert text chunks into embeddings and store in FAISS under their stable chunk ids."""
         articles = self.load_chunks()
         if not articles:
             print("⚠️ No chunked articles found!")
             return
 
+        ids = np.array(assign_chunk_ids(articles), dtype=np.int64)
         texts = [article["content"] for article in articles]
-        
-        # Generate embeddings
-        if self.use_openai:
-            vectors = self.embeddings.embed_documents(texts)
-        else:
-            vectors = self.embeddings_model.encode(texts)
-            print(f"\nGenerated vectors: {vectors}")
+        del articles
 
-        # Convert to NumPy array
-        vectors = np.array(vectors, dtype="float32")
+        # Generate embeddings straight into a memory-mapped file
+        vectors = self.embed_to_memmap(texts)
 
-        # Create FAISS index
-        index = faiss.IndexFlatL2(vectors.shape[1])  # L2 distance for similarity search
-        index.add(vectors)
+        # Create FAISS index (trained on a sample if the spec needs it), fed from the memory map one block at a time
+        index = build_index(self.index_spec, vectors.shape[1], self.training_sample(vectors), metric=self.metric)
+        set_search_params(index, nprobe=self.nprobe, ef_search=self.ef_search)
+        for start in range(0, len(vectors), self.write_batch):
+            block = self.index_vectors(vectors[start:start + self.write_batch])
+            index.add_with_ids(block, ids[start:start + self.write_batch])
 
         # Save the index
-        faiss.write_index(index, self.vector_db_path)
-        print(f"FAISS index saved to {self.vector_db_path}")
+        write_index(index, self.vector_db_path)
+        self.save_manifest(ids, [text_digest(text) for text in texts])
+        print(f"FAISS {self.index_spec} ({self.metric}) index saved to {self.vector_db_path} ({index.ntotal} vectors, "
+              f"embeddings in {self.vectors_file})")
+        return index
+
+    def training_sample(self, vectors):
+        """Up to `train_size` random rows of `vectors` for index types that need training (IVF, PQ, OPQ)."""
+        if faiss.index_factory(vectors.shape[1], resolve_spec(self.index_spec, vectors.shape[1])).is_trained:
+            return None
+        if len(vectors) <= self.train_size:
+            return self.index_vectors(vectors)
+        rows = np.sort(np.random.default_rng(0).choice(len(vectors), self.train_size, replace=False))
+        return self.index_vectors(vectors[rows])
+
+    def upsert_chunks(self, index, chunks, ids, manifest):
+        """Add `chunks` under `ids`, replacing any vectors already stored under those ids.
+
+        Returns the raw embeddings of `chunks` (None if there were none).
+        """
+        if not chunks:
+            return None
+        texts = [chunk["content"] for chunk in chunks]
+        ids = np.asarray(ids, dtype=np.int64)
+        vectors = self.embed(texts)
+        index.remove_ids(ids)
+        index.add_with_ids(self.index_vectors(vectors), ids)
+        for chunk_id, text in zip(ids.tolist(), texts):
+            manifest[chunk_id] = text_digest(text)
+        return vectors
+
+    def update_vectors_file(self, old_ids, ids, texts, fresh):
+        """Rewrite the vectors file so row i holds the embedding of chunk `ids[i]` again.
+
+        Unchanged rows are copied over from the current file (whose rows follow `old_ids`), and `fresh`
+        maps upserted ids to their new embeddings. The file is what the exact reranker reads, so it must
+        follow the manifest. If it does not match `old_ids`, it is re-created from `texts` through the cache.
+        """
+        old = np.load(self.vectors_file, mmap_mode="r") if os.path.exists(self.vectors_file) else None
+        if old is None or len(old) != len(old_ids):
+            print("Vectors file does not match the manifest, rewriting it.")
+            self.embed_to_memmap(texts)
+            return
+        old_rows = {chunk_id: row for row, chunk_id in enumerate(old_ids)}
+        tmp_file = f"{self.vectors_file}.tmp"
+        vectors = np.lib.format.open_memmap(tmp_file, mode="w+", dtype=old.dtype, shape=(len(ids), old.shape[1]))
+        for start in range(0, len(ids), self.write_batch):
+            block_ids = ids[start:start + self.write_batch]
+            rows = np.array([-1 if i in fresh else old_rows.get(i, -1) for i in block_ids], dtype=np.int64)
+            copied = np.flatnonzero(rows >= 0)
+            vectors[start + copied] = old[rows[copied]]
+            for offset in np.flatnonzero(rows < 0):
+                vectors[start + offset] = fresh[block_ids[offset]]
+        vectors.flush()
+        del vectors, old
+        os.replace(tmp_file, self.vectors_file)
+
+    def remove_ids(self, index, ids, manifest):
+        """Drop the vectors of `ids` from the index; returns how many were removed."""
+        for chunk_id in ids:
+            manifest.pop(chunk_id, None)
+        if not len(ids):
+            return 0
+        return index.remove_ids(np.asarray(ids, dtype=np.int64))
+
+    def sync_faiss_index(self, allow_empty=False):
+        """Bring the saved index in line with the chunk file without rebuilding it.
+
+        Chunks whose id is new or whose content changed are (re-)embedded and upserted, ids that
+        no longer exist are removed. Falls back to a full build when there is no ID-mapped index yet,
+        when the saved index uses another metric, or when vectors must be removed from an index type
+        that cannot delete (HNSW).
+
+        If the chunk file cannot be read, or holds no chunks, nothing is saved: removing every vector
+        because of a truncated file would wipe the index. Pass `allow_empty=True` to really empty it.
+        """
+        index = read_index(self.vector_db_path) if os.path.exists(self.vector_db_path) else None
+        manifest = self.load_manifest()
+        if index is None or not is_id_mapped(index) or not manifest:
+            print("No ID-mapped index to update, building from scratch.")
+            return self.create_faiss_index()
+        if index.metric_type != METRICS[self.metric]:
+            print(f"Saved index uses another metric than {self.metric!r}, rebuilding.")
+            return self.create_faiss_index()
+
+        try:
+            chunks = self.load_chunks(strict=True)
+        except Exception as e:
+            print(f"⚠️ Could not load chunks, index left unchanged: {e}")
+            return None
+        if not chunks and not allow_empty:
+            print(f"⚠️ No chunks in {self.chunked_file}, index left unchanged (pass allow_empty=True to empty it).")
+            return None
+        ids = assign_chunk_ids(chunks)
+        current = set(ids)
+        changed = [i for i, (chunk_id, chunk) in enumerate(zip(ids, chunks))
+                   if manifest.get(chunk_id) != text_digest(chunk["content"])]
+        replaced = any(ids[i] in manifest for i in changed) or any(chunk_id not in current for chunk_id in manifest)
+        if replaced and not supports_removal(index):
+            print("Index type cannot remove vectors (HNSW), rebuilding.")
+            return self.create_faiss_index()
+        old_ids = list(manifest)
+        removed = self.remove_ids(index, [chunk_id for chunk_id in manifest if chunk_id not in current], manifest)
+        vectors = self.upsert_chunks(index, [chunks[i] for i in changed], [ids[i] for i in changed], manifest)
+
+        write_index(index, self.vector_db_path)
+        if changed or removed or ids != old_ids:  # a pure reorder also moves rows of the vectors file
+            fresh = dict(zip((ids[i] for i in changed), vectors)) if vectors is not None else {}
+            self.update_vectors_file(old_ids, ids, [chunk["content"] for chunk in chunks], fresh)
+        # manifest rows follow the chunk order, which is also the row order of the vectors file
+        self.save_manifest(ids, [manifest[chunk_id] for chunk_id in ids])
+        print(f"FAISS index updated: {len(changed)} chunks upserted, {removed} removed, {index.ntotal} vectors")
+        return index
+
+    def check_consistency(self, chunks=None):
+        """Verify that the ids in the saved index match the chunks (by default the chunk file)."""
+        index = self.load_faiss_index()
+        if index is None:
+            return None
+        report = check_consistency(index, chunks if chunks is not None else self.load_chunks())
+        print(f"Index consistency: {report}")
+        return report
 
     def load_faiss_index(self):
         """Load the FAISS index from disk."""
@@ -67,9 +320,12 @@ if __name__ == "__main__":
     indexer = FAISSIndexer(
         chunked_file="/home/shtlp_0060/Desktop/Python Data Scrapping Project/data/football_chunks/football_chunks.json",
         vector_db_path="/home/shtlp_0060/Desktop/Python Data Scrapping Project/data/faiss/faiss_index",
-        use_openai=False
+        use_openai=False,
+        workers=os.cpu_count(),
+        cache_dir="/home/shtlp_0060/Desktop/Python Data Scrapping Project/data/faiss/embedding_cache",
     )
-    indexer.create_faiss_index()
+    indexer.sync_faiss_index()
+    indexer.check_consistency()
 
 
 
@@ -0,0 +1,159 @@
+import argparse
+import datetime
+import json
+import mmap
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import zstandard
+
+from scrapers.extractors import get_extractor
+
+
+class HTMLArchive:
+    """Append-only, WARC-style archive of fetched pages.
+
+    Every response is stored as its own zstd frame in `<path>` and located through an
+    append-only `<path>.idx` file of `offset<TAB>length<TAB>url` lines, so single records can
+    be decompressed straight out of a memory map. Data is written before its index line, so a
+    crash can only leave unindexed bytes at the end, which readers ignore.
+    """
+
+    def __init__(self, path, level=3):
+        self.path = path
+        self.index_path = f"{path}.idx"
+        self.compressor = zstandard.ZstdCompressor(level=level)
+        self.lock = threading.Lock()
+        self.data_file = open(path, "ab")
+        self.index_file = open(self.index_path, "a", encoding="utf-8")
+        self.records = 0
+
+    @staticmethod
+    def build_record(url, html, headers=None, status_code=200):
+        """Serialise one response as a WARC/1.1 response record (HTTP headers + body as the block)."""
+        body = html.encode("utf-8")
+        http_headers = "".join(f"{name}: {value}\r\n" for name, value in (headers or {}).items()
+                               if name.lower() not in ("content-length", "content-encoding", "transfer-encoding"))
+        block = f"HTTP/1.1 {status_code}\r\n{http_headers}Content-Length: {len(body)}\r\n\r\n".encode("utf-8") + body
+        warc_header = (
+            "WARC/1.1\r\n"
+            "WARC-Type: response\r\n"
+            f"WARC-Target-URI: {url}\r\n"
+            f"WARC-Date: {datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')}\r\n"
+            "Content-Type: application/http; msgtype=response\r\n"
+            f"Content-Length: {len(block)}\r\n\r\n"
+        )
+        return warc_header.encode("utf-8") + block + b"\r\n\r\n"
+
+    def append(self, url, html, headers=None, status_code=200):
+        """Compress and append one fetched page."""
+        frame = self.compressor.compress(self.build_record(url, html, headers, status_code))
+        with self.lock:
+            offset = self.data_file.seek(0, os.SEEK_END)
+            self.data_file.write(frame)
+            self.data_file.flush()
+            self.index_file.write(f"{offset}\t{len(frame)}\t{url}\n")
+            self.index_file.flush()
+            self.records += 1
+
+    def close(self):
+        with self.lock:
+            self.data_file.close()
+            self.index_file.close()
+
+
+class ArchiveReader:
+    """Random access to an HTMLArchive through a read-only memory map."""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = []
+        with open(f"{path}.idx", "r", encoding="utf-8") as f:
+            for line in f:
+                parts = line.rstrip("\n").split("\t")
+                if len(parts) == 3 and parts[0].isdigit() and parts[1].isdigit():
+                    self.entries.append((int(parts[0]), int(parts[1]), parts[2]))
+        self.file = open(path, "rb")
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(path) else b""
+        self.entries = [e for e in self.entries if e[0] + e[1] <= len(self.mm)]
+        self.decompressor = zstandard.ZstdDecompressor()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def latest_positions(self):
+        """Positions of the newest record for every URL, in archive order."""
+        latest = {url: i for i, (_, _, url) in enumerate(self.entries)}
+        return sorted(latest.values())
+
+    def read(self, position):
+        """Return (url, http_headers, html) for the record at `position`."""
+        offset, length, url = self.entries[position]
+        record = self.decompressor.decompress(self.mm[offset:offset + length])
+        _, block = record.split(b"\r\n\r\n", 1)
+        http_head, body = block.split(b"\r\n\r\n", 1)
+        headers = {}
+        for line in http_head.decode("utf-8").split("\r\n")[1:]:
+            name, _, value = line.partition(": ")
+            headers[name] = value
+        length = int(headers.get("Content-Length", len(body)))
+        return url, headers, body[:length].decode("utf-8")
+
+    def close(self):
+        if isinstance(self.mm, mmap.mmap):
+            self.mm.close()
+        self.file.close()
+
+
+_reader = None
+_extractor = None
+
+
+def _init_reparse_worker(archive_path, backend):
+    global _reader, _extractor
+    _reader = ArchiveReader(archive_path)
+    _extractor = get_extractor(backend)
+
+
+def _reparse_positions(positions):
+    articles = []
+    for position in positions:
+        url, _, html = _reader.read(position)
+        title, content = _extractor.extract(html)
+        articles.append({"url": url, "title": title, "content": content})
+    return articles
+
+
+def reparse_archive(archive_path, output_file, workers=None, backend="beautifulsoup", batch_size=256):
+    """Rebuild the articles JSON from archived HTML with a process pool, without touching the network."""
+    reader = ArchiveReader(archive_path)
+    positions = reader.latest_positions()
+    reader.close()
+    batches = [positions[i:i + batch_size] for i in range(0, len(positions), batch_size)]
+
+    start = time.perf_counter()
+    articles = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_reparse_worker,
+                             initargs=(archive_path, backend)) as executor:
+        for batch in executor.map(_reparse_positions, batches):
+            articles.extend(batch)
+    elapsed = time.perf_counter() - start
+
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(articles, f, indent=4, ensure_ascii=False)
+    print(f" Reparsed {len(articles)} pages in {elapsed:.2f}s ({len(articles) / max(elapsed, 1e-9):.0f} pages/sec) "
+          f"-> `{output_file}`")
+    return articles
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild football_articles.json from the raw HTML archive.")
+    parser.add_argument("command", choices=["reparse"])
+    parser.add_argument("archive", help="Path to the .warc.zst archive")
+    parser.add_argument("output", help="Articles JSON file to write")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--backend", default="beautifulsoup")
+    args = parser.parse_args()
+    reparse_archive(args.archive, args.output, workers=args.workers, backend=args.backend)
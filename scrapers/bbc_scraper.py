@@ -1,10 +1,23 @@
 import requests
 from bs4 import BeautifulSoup
+import gzip
 import json
+import os
+import threading
 import time
-from urllib.parse import urljoin
+import xml.etree.ElementTree as ET
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse
+from scrapers.archive import HTMLArchive
+from scrapers.crawl_state import CrawlStateStore
+from scrapers.discovery import LinkFrontier, iter_feed_urls
+from scrapers.extractors import get_extractor
+from scrapers.http_session import CrawlSession
+from scrapers.rate_limiter import HostRateLimiter
 
 class BBCFootballScraper:
+    SITE_URL = "https://www.bbc.com"
     BASE_URL = "https://www.bbc.com/sport/football"
     CATEGORY_PAGES = [
         BASE_URL,  
@@ -37,59 +50,199 @@ class BBCFootballScraper:
         "https://www.bbc.co.uk/sport/africa"
     ]  
 
+    # RSS feeds and sitemaps (or sitemap indexes) read by discover_feed_links
+    FEED_URLS = [
+        "https://feeds.bbci.co.uk/sport/football/rss.xml",
+    ]
+
     HEADERS = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
     }
 
-    def __init__(self, limit=None):
+    def __init__(self, limit=None, concurrency=8, requests_per_second=4.0, burst=4, state_store=None,
+                 extractor="beautifulsoup", session=None, frontier=None, archive=None):
         self.limit = limit
-        self.article_links = set()
+        # Bloom filter plus an on-disk spool (a temporary file unless LinkFrontier(spool_path=...) is passed)
+        self.article_links = frontier if frontier is not None else LinkFrontier()
         self.scraped_articles = []
+        self.concurrency = concurrency
+        self.rate_limiter = HostRateLimiter(requests_per_second, burst)
+        # With a CrawlStateStore only new or changed articles end up in scraped_articles
+        self.state_store = state_store
+        self.crawl_status = Counter()
+        self.status_lock = threading.Lock()
+        # url -> (content hash, ETag, Last-Modified) of accepted articles not yet written to disk
+        self.pending_state = {}
+        self.extractor = get_extractor(extractor)
+        # One keep-alive session for the whole crawl, with enough pooled connections for every worker
+        self.session = session or CrawlSession(headers=self.HEADERS, pool_maxsize=max(concurrency, 1))
+        # Optional HTMLArchive: raw pages are kept so extraction can be rerun offline
+        self.archive = archive
+
+    def extract_article_links(self, html):
+        """Return the article URLs linked from a category page."""
+        soup = BeautifulSoup(html, 'html.parser')
+        links = []
+        for article in soup.select("a.ssrcss-sxweo-PromoLink"):
+            href = article.get("href")
+            if href and href.startswith("/sport/football/articles"):
+                links.append(urljoin(self.SITE_URL, href))
+        return links
+
+    def normalize_article_url(self, url):
+        """Map a football article URL from any BBC host/feed to its canonical form, or None."""
+        path = urlparse(url).path
+        if not path.startswith("/sport/football/articles"):
+            return None
+        return urljoin(self.SITE_URL, path)
+
+    def discover_feed_links(self, feed_urls=None):
+        """Stream article links out of RSS feeds and sitemaps, following sitemap indexes.
+
+        XML is parsed incrementally and links go straight into the Bloom-filter frontier, so
+        tens of thousands of historical URLs are discovered in flat memory.
+        """
+        pending = list(feed_urls or self.FEED_URLS)
+        visited = set()
+        before = len(self.article_links)
+        while pending:
+            feed_url = pending.pop()
+            if feed_url in visited:
+                continue
+            visited.add(feed_url)
+            print(f" Reading feed: {feed_url}")
+            self.rate_limiter.acquire(feed_url)
+            response = None
+            try:
+                response = self.session.get(feed_url, stream=True)
+                if response.status_code != 200:
+                    print(f" Failed to fetch {feed_url}")
+                    continue
+                response.raw.decode_content = True
+                stream = gzip.GzipFile(fileobj=response.raw) if feed_url.endswith(".gz") else response.raw
+                for kind, url in iter_feed_urls(stream):
+                    if kind == "sitemap":
+                        pending.append(url)
+                    else:
+                        article_url = self.normalize_article_url(url)
+                        if article_url:
+                            self.article_links.add(article_url)
+            except (requests.exceptions.RequestException, ET.ParseError, OSError) as e:
+                print(f"⚠️ Error reading {feed_url}: {e}")
+            finally:
+                if response is not None:
+                    response.close()
+
+        print(f" Discovered {len(self.article_links) - before} new article links from feeds.")
 
     def get_article_links(self):
         """Fetch all article links from multiple BBC Football category pages."""
         for page in self.CATEGORY_PAGES:
             print(f" Scraping category page: {page}")
-            response = requests.get(page, headers=self.HEADERS)
+            try:
+                response = self.session.get(page)
+            except requests.exceptions.RequestException as e:
+                print(f"⚠️ Error fetching {page}: {e}")
+                continue
             if response.status_code != 200:
                 print(f" Failed to fetch {page}")
                 continue
 
-            soup = BeautifulSoup(response.text, 'html.parser')
-            articles = soup.select("a.ssrcss-sxweo-PromoLink")
-
-            for article in articles:
-                href = article.get("href")
-                if href and href.startswith("/sport/football/articles"):
-                    self.article_links.add(urljoin("https://www.bbc.com", href))
+            self.article_links.update(self.extract_article_links(response.text))
 
             time.sleep(2)  # Avoid rate limiting
 
         print(f" Extracted {len(self.article_links)} unique article links.")
 
-    def scrape_article(self, url):
-        """Scrape the article title and content from a given BBC Football article URL."""
+    def fetch_category_links(self, page):
+        """Fetch one category page under the per-host rate limit and return its article links."""
+        self.rate_limiter.acquire(page)
         try:
-            response = requests.get(url, headers=self.HEADERS, timeout=10)
-            if response.status_code != 200:
-                print(f" Failed to fetch {url}")
-                return None
-
-            soup = BeautifulSoup(response.text, 'html.parser')
+            response = self.session.get(page)
+        except requests.exceptions.RequestException as e:
+            print(f"⚠️ Error fetching {page}: {e}")
+            return []
+        if response.status_code != 200:
+            print(f" Failed to fetch {page}")
+            return []
+        return self.extract_article_links(response.text)
 
-            # Extract title
-            title_tag = soup.find("h1")
-            title = title_tag.text.strip() if title_tag else "No Title"
+    def get_article_links_concurrent(self):
+        """Fetch all category pages in parallel, bounded by `concurrency` and the per-host rate limit."""
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for links in executor.map(self.fetch_category_links, self.CATEGORY_PAGES):
+                self.article_links.update(links)
 
-            # Extract article body
-            paragraphs = soup.select("article p")
-            content = "\n".join([p.text.strip() for p in paragraphs if p.text.strip()])
+        print(f" Extracted {len(self.article_links)} unique article links.")
 
-            return {"url": url, "title": title, "content": content}
+    def _count_status(self, status):
+        with self.status_lock:
+            self.crawl_status[status] += 1
 
+    def fetch_article(self, url):
+        """Fetch an article page. Returns the response, or None if it failed or was not modified."""
+        headers = None
+        if self.state_store is not None:
+            headers = self.state_store.conditional_headers(url)
+        try:
+            response = self.session.get(url, headers=headers)
         except requests.exceptions.RequestException as e:
             print(f"⚠️ Error fetching {url}: {e}")
             return None
+        if response.status_code == 304 and self.state_store is not None:
+            self.state_store.mark_not_modified(url)
+            self._count_status("not_modified")
+            return None
+        if response.status_code != 200:
+            print(f" Failed to fetch {url}")
+            return None
+        return response
+
+    def scrape_article(self, url):
+        """Scrape the article title and content from a given BBC Football article URL."""
+        response = self.fetch_article(url)
+        if response is None:
+            return None
+
+        # Extract title and article body
+        title, content = self.extractor.extract(response.text)
+        return self.accept_article({"url": url, "title": title, "content": content}, response)
+
+    def accept_article(self, article, response):
+        """Return the article, or None if the crawl state shows it has not changed since the last run.
+
+        The state of a new or changed article is only held in `pending_state` until `commit_state` is
+        called after the article has been written, so a crash in between does not mark it as seen.
+        Only pages with new or changed content are added to the archive.
+        """
+        if self.state_store is None:
+            self.archive_page(article["url"], response)
+            return article
+        content_hash = self.state_store.content_hash(article)
+        state = (content_hash, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        status = self.state_store.status(article["url"], content_hash)
+        self._count_status(status)
+        if status == "unchanged":
+            self.state_store.record(article["url"], *state)  # refresh the validators, nothing to write
+            return None
+        self.archive_page(article["url"], response)
+        with self.status_lock:
+            self.pending_state[article["url"]] = state
+        return article
+
+    def archive_page(self, url, response):
+        if self.archive is not None:
+            self.archive.append(url, response.text, response.headers)
+
+    def commit_state(self, articles):
+        """Record the crawl state of `articles` once they have been persisted."""
+        if self.state_store is None:
+            return
+        for article in articles:
+            with self.status_lock:
+                state = self.pending_state.pop(article["url"], None)
+            if state is not None:
+                self.state_store.record(article["url"], *state)
 
     def scrape_articles(self):
         """Scrape multiple articles from BBC Football."""
@@ -104,16 +257,86 @@ class BBCFootballScraper:
 
         return self.scraped_articles
 
+    def scrape_article_rate_limited(self, url):
+        """Scrape one article once the per-host token bucket allows another request."""
+        self.rate_limiter.acquire(url)
+        return self.scrape_article(url)
+
+    def scrape_articles_concurrent(self):
+        """Scrape articles with a thread pool, using the per-host token bucket instead of fixed sleeps."""
+        self.get_article_links_concurrent()
+
+        links = list(self.article_links)[:self.limit] if self.limit else list(self.article_links)
+        print(f" Scraping {len(links)} articles with {self.concurrency} workers")
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for article_data in executor.map(self.scrape_article_rate_limited, links):
+                if article_data:
+                    self.scraped_articles.append(article_data)
+
+        return self.scraped_articles
+
+    def crawl_report(self):
+        """Print and return the session counters for this crawl."""
+        report = self.session.report()
+        print(f" Requests: {report.get('requests', 0)}, retries: {report.get('retries', 0)}, "
+              f"errors: {report.get('errors', 0)}")
+        print(f" Transferred {report.get('bytes_received', 0) / 1e6:.2f} MB "
+              f"({report.get('bytes_decoded', 0) / 1e6:.2f} MB decoded), "
+              f"connection reuse {report['connection_reuse_rate']:.0%}")
+        return report
+
     def save_articles(self, filepath):
         """Save scraped articles to a JSON file."""
         with open(filepath, "w", encoding="utf-8") as f:
             json.dump(self.scraped_articles, f, indent=4, ensure_ascii=False)
+        self.commit_state(self.scraped_articles)
         print(f" Scraping completed! {len(self.scraped_articles)} articles saved in `{filepath}`")
 
+    def save_delta(self, filepath):
+        """Save only the new or changed articles of an incremental crawl as a JSON delta file."""
+        with open(filepath, "w", encoding="utf-8") as f:
+            json.dump(self.scraped_articles, f, indent=4, ensure_ascii=False)
+        print(f" Delta saved in `{filepath}`: {self.crawl_status['new']} new, {self.crawl_status['changed']} changed, "
+              f"{self.crawl_status['unchanged'] + self.crawl_status['not_modified']} unchanged")
+
+    def merge_articles(self, filepath):
+        """Merge the scraped articles into an existing articles file, replacing entries by URL."""
+        try:
+            with open(filepath, "r", encoding="utf-8") as f:
+                articles = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            articles = []
+
+        positions = {article["url"]: i for i, article in enumerate(articles)}
+        for article in self.scraped_articles:
+            if article["url"] in positions:
+                articles[positions[article["url"]]] = article
+            else:
+                positions[article["url"]] = len(articles)
+                articles.append(article)
+
+        with open(filepath, "w", encoding="utf-8") as f:
+            json.dump(articles, f, indent=4, ensure_ascii=False)
+        self.commit_state(self.scraped_articles)
+        print(f" Merged {len(self.scraped_articles)} articles into `{filepath}` ({len(articles)} total)")
+
 if __name__ == "__main__":
-    scraper = BBCFootballScraper(limit=None)  # Scrape all articles
-    articles = scraper.scrape_articles()
-    scraper.save_articles("/home/shtlp_0060/Desktop/Python Data Scrapping Project/data/football_articles/football_articles.json")
+    data_dir = "/home/shtlp_0060/Desktop/Python Data Scrapping Project/data"
+    os.makedirs(f"{data_dir}/crawl_state", exist_ok=True)
+    os.makedirs(f"{data_dir}/raw_html", exist_ok=True)
+    state_store = CrawlStateStore(f"{data_dir}/crawl_state/crawl_state.db")
+    archive = HTMLArchive(f"{data_dir}/raw_html/football_pages.warc.zst")
+
+    # Scrape all articles, incrementally, keeping the raw HTML for offline reparsing
+    scraper = BBCFootballScraper(limit=None, state_store=state_store, archive=archive)
+    scraper.discover_feed_links()  # RSS/sitemap links join the category-page links in the frontier
+    articles = scraper.scrape_articles_concurrent()
+    scraper.crawl_report()
+    scraper.save_delta(f"{data_dir}/football_articles/football_articles_delta.json")
+    scraper.merge_articles(f"{data_dir}/football_articles/football_articles.json")
+    state_store.close()
+    archive.close()
+    scraper.article_links.close()
 
 
 
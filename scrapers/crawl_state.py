@@ -0,0 +1,99 @@
+import datetime
+import hashlib
+import sqlite3
+import threading
+
+
+class CrawlStateStore:
+    """Persistent per-URL crawl state (ETag, Last-Modified, content hash) backed by SQLite."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS crawl_state (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT,
+                first_seen TEXT,
+                last_fetched TEXT,
+                last_changed TEXT
+            )"""
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def content_hash(article):
+        """Hash the extracted title and content so markup-only changes don't count as edits."""
+        text = f"{article['title']}\n{article['content']}"
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get(self, url):
+        """Return the stored state for `url` as a dict, or None if it has never been crawled."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT etag, last_modified, content_hash, first_seen, last_fetched, last_changed "
+                "FROM crawl_state WHERE url = ?",
+                (url,),
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ("etag", "last_modified", "content_hash", "first_seen", "last_fetched", "last_changed")
+        return dict(zip(keys, row))
+
+    def conditional_headers(self, url):
+        """Build If-None-Match / If-Modified-Since headers from the last successful fetch."""
+        state = self.get(url)
+        headers = {}
+        if state:
+            if state["etag"]:
+                headers["If-None-Match"] = state["etag"]
+            if state["last_modified"]:
+                headers["If-Modified-Since"] = state["last_modified"]
+        return headers
+
+    def mark_not_modified(self, url):
+        """Record a 304 response: the page was checked but nothing changed."""
+        now = datetime.datetime.now().isoformat()
+        with self.lock:
+            self.conn.execute("UPDATE crawl_state SET last_fetched = ? WHERE url = ?", (now, url))
+            self.conn.commit()
+
+    def status(self, url, content_hash):
+        """Compare `content_hash` with the stored one without writing. Returns "new", "changed" or "unchanged"."""
+        state = self.get(url)
+        if state is None:
+            return "new"
+        return "unchanged" if state["content_hash"] == content_hash else "changed"
+
+    def record(self, url, content_hash, etag=None, last_modified=None):
+        """Store the validators and content hash for `url`. Returns "new", "changed" or "unchanged"."""
+        now = datetime.datetime.now().isoformat()
+        with self.lock:
+            row = self.conn.execute("SELECT content_hash FROM crawl_state WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                status = "new"
+                self.conn.execute(
+                    "INSERT INTO crawl_state VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (url, etag, last_modified, content_hash, now, now, now),
+                )
+            else:
+                status = "unchanged" if row[0] == content_hash else "changed"
+                self.conn.execute(
+                    "UPDATE crawl_state SET etag = ?, last_modified = ?, content_hash = ?, last_fetched = ?, "
+                    "last_changed = CASE WHEN content_hash = ? THEN last_changed ELSE ? END WHERE url = ?",
+                    (etag, last_modified, content_hash, now, content_hash, now, url),
+                )
+            self.conn.commit()
+        return status
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM crawl_state").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
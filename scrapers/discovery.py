@@ -0,0 +1,126 @@
+import hashlib
+import math
+import os
+import tempfile
+import threading
+import weakref
+import xml.etree.ElementTree as ET
+
+
+class BloomFilter:
+    """Fixed-size probabilistic set: no false negatives, about `error_rate` false positives at `capacity` items."""
+
+    def __init__(self, capacity=100_000, error_rate=0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, item):
+        # Kirsch-Mitzenmacher double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, item):
+        """Add `item`; returns True if it was (probably) not present before."""
+        added = False
+        for pos in self._positions(item):
+            byte, bit = divmod(pos, 8)
+            if not self.bits[byte] & (1 << bit):
+                self.bits[byte] |= 1 << bit
+                added = True
+        return added
+
+    def __contains__(self, item):
+        return all(self.bits[pos // 8] & (1 << (pos % 8)) for pos in self._positions(item))
+
+
+class LinkFrontier:
+    """Deduplicated, insertion-ordered set of discovered links.
+
+    Membership is answered by a Bloom filter and the links themselves are appended to a spool
+    file on disk, so memory stays flat however many URLs are seen. Without `spool_path` the
+    spool is a temporary file that is removed when the frontier is closed or garbage collected.
+    """
+
+    def __init__(self, capacity=100_000, error_rate=0.001, spool_path=None):
+        self.seen = BloomFilter(capacity, error_rate)
+        if spool_path is None:
+            fd, spool_path = tempfile.mkstemp(prefix="link_frontier-", suffix=".txt")
+            os.close(fd)
+            self._cleanup = weakref.finalize(self, os.remove, spool_path)
+        else:
+            self._cleanup = None
+        self.spool_path = spool_path
+        self.spool = open(spool_path, "w", encoding="utf-8")
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def add(self, url):
+        """Record `url` if it is new. Returns True when it was added."""
+        with self.lock:
+            if not self.seen.add(url):
+                return False
+            self.spool.write(url + "\n")
+            self.count += 1
+            return True
+
+    def update(self, urls):
+        for url in urls:
+            self.add(url)
+
+    def __contains__(self, url):
+        return url in self.seen
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        with self.lock:
+            self.spool.flush()
+            count = self.count
+        return self._iter_spool(count)
+
+    def _iter_spool(self, count):
+        # Only the links present when iteration started, like iterating a copy of a list
+        with open(self.spool_path, "r", encoding="utf-8") as f:
+            for _, line in zip(range(count), f):
+                yield line.rstrip("\n")
+
+    def close(self):
+        """Close the spool; a temporary spool file is deleted."""
+        self.spool.close()
+        if self._cleanup is not None:
+            self._cleanup()
+
+
+def _local_name(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def iter_feed_urls(stream):
+    """Stream (kind, url) pairs out of an RSS feed, a sitemap or a sitemap index.
+
+    `kind` is "sitemap" for child sitemaps of an index and "page" for everything else. The XML
+    is read incrementally with iterparse and each entry is dropped once handled, so even a
+    50,000-URL sitemap is parsed in constant memory.
+    """
+    parents = []
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            parents.append(elem)
+            continue
+        parents.pop()
+        name = _local_name(elem.tag)
+        if name not in ("url", "sitemap", "item"):
+            continue
+        for child in elem:
+            if _local_name(child.tag) in ("loc", "link") and child.text:
+                yield ("sitemap" if name == "sitemap" else "page"), child.text.strip()
+                break
+        # Detach the finished entry so the partially built tree never grows
+        if parents:
+            parents[-1].remove(elem)
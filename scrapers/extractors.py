@@ -0,0 +1,187 @@
+from html.parser import HTMLParser
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+except ImportError:  # lxml is only needed for the "lxml" backend
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # selectolax is only needed for the "selectolax" backend
+    LexborHTMLParser = None
+
+NO_TITLE = "No Title"
+# BeautifulSoup leaves the text of these elements out of .text, so the fast paths drop them too
+NON_TEXT_TAGS = ("script", "style", "template")
+
+
+def join_paragraphs(paragraphs):
+    """Join stripped, non-empty paragraph texts the way scrape_article always has."""
+    return "\n".join(text for text in (p.strip() for p in paragraphs) if text)
+
+
+class BeautifulSoupExtractor:
+    """Reference extractor: full BeautifulSoup tree with the pure-Python html.parser."""
+
+    name = "beautifulsoup"
+
+    def extract(self, html):
+        """Return (title, content) for an article page."""
+        soup = BeautifulSoup(html, 'html.parser')
+        title_tag = soup.find("h1")
+        title = title_tag.text.strip() if title_tag else NO_TITLE
+        content = join_paragraphs(p.text for p in soup.select("article p"))
+        return title, content
+
+
+class LxmlExtractor:
+    """Fast path: libxml2's C HTML parser, queried with XPath.
+
+    Like any HTML5-style parser it closes a <p> at the first block element inside it, so
+    `<p>a<ul><li>x</li></ul>b</p>` yields "a" where BeautifulSoup yields "axb".
+    """
+
+    name = "lxml"
+
+    def __init__(self):
+        if lxml is None:
+            raise ImportError("The 'lxml' extractor requires the lxml package (pip install lxml).")
+
+    def extract(self, html):
+        """Return (title, content) for an article page."""
+        try:
+            doc = lxml.html.fromstring(html)
+        except (ValueError, lxml.etree.ParserError):
+            return NO_TITLE, ""
+        lxml.etree.strip_elements(doc, *NON_TEXT_TAGS, with_tail=False)
+        h1 = doc.xpath("(//h1)[1]")
+        title = h1[0].text_content().strip() if h1 else NO_TITLE
+        content = join_paragraphs(p.text_content() for p in doc.xpath("//article//p"))
+        return title, content
+
+
+class SelectolaxExtractor:
+    """Fast path: selectolax's Lexbor-backed parser with CSS selectors (same <p> caveat as lxml)."""
+
+    name = "selectolax"
+
+    def __init__(self):
+        if LexborHTMLParser is None:
+            raise ImportError("The 'selectolax' extractor requires the selectolax package (pip install selectolax).")
+
+    def extract(self, html):
+        """Return (title, content) for an article page."""
+        tree = LexborHTMLParser(html)
+        tree.strip_tags(list(NON_TEXT_TAGS))
+        h1 = tree.css_first("h1")
+        title = h1.text(deep=True).strip() if h1 else NO_TITLE
+        content = join_paragraphs(p.text(deep=True) for p in tree.css("article p"))
+        return title, content
+
+
+class _ArticleTextParser(HTMLParser):
+    """Event-driven parser that keeps only the first <h1> and the <p> text inside <article>.
+
+    It tracks a stack of open tag names and closes tags the way BeautifulSoup's html.parser
+    builder does (an end tag pops back to its matching start tag, unmatched end tags are
+    ignored), so the output matches the reference extractor without building a DOM.
+    """
+
+    VOID_TAGS = {
+        "area", "base", "br", "col", "embed", "hr", "img", "input", "keygen", "link",
+        "menuitem", "meta", "param", "source", "track", "wbr", "basefont", "bgsound",
+        "command", "frame", "image", "isindex", "nextid", "spacer",
+    }
+    SKIPPED_TAGS = set(NON_TEXT_TAGS) | {"rt", "rp"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack = []
+        self.title_parts = None
+        self.title_done = False
+        self.h1_open = False
+        self.article_depth = 0
+        self.skip_depth = 0
+        self.paragraphs = []
+        self.open_paragraphs = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.VOID_TAGS:
+            return
+        self.stack.append(tag)
+        if tag in self.SKIPPED_TAGS:
+            self.skip_depth += 1
+        elif tag == "h1" and not self.title_done and not self.h1_open:
+            self.h1_open = True
+            self.title_parts = []
+            self.stack[-1] = "h1*"
+        elif tag == "article":
+            self.article_depth += 1
+        elif tag == "p" and self.article_depth:
+            self.open_paragraphs.append(len(self.paragraphs))
+            self.paragraphs.append([])
+            self.stack[-1] = "p*"
+
+    def handle_endtag(self, tag):
+        for i in range(len(self.stack) - 1, -1, -1):
+            if self.stack[i].rstrip("*") == tag:
+                while len(self.stack) > i:
+                    self._close(self.stack.pop())
+                return
+
+    def _close(self, tag):
+        if tag in self.SKIPPED_TAGS:
+            self.skip_depth -= 1
+        elif tag == "h1*":
+            self.h1_open = False
+            self.title_done = True
+        elif tag == "article":
+            self.article_depth -= 1
+        elif tag == "p*":
+            self.open_paragraphs.pop()
+
+    def handle_data(self, data):
+        if self.skip_depth:
+            return
+        if self.h1_open:
+            self.title_parts.append(data)
+        for idx in self.open_paragraphs:
+            self.paragraphs[idx].append(data)
+
+    def result(self):
+        title = "".join(self.title_parts).strip() if self.title_parts is not None else NO_TITLE
+        return title, join_paragraphs("".join(parts) for parts in self.paragraphs)
+
+
+class StreamingExtractor:
+    """Streaming extractor: no DOM, only the title and article paragraph text are buffered."""
+
+    name = "streaming"
+
+    def extract(self, html):
+        """Return (title, content) for an article page."""
+        parser = _ArticleTextParser()
+        parser.feed(html)
+        parser.close()
+        return parser.result()
+
+
+EXTRACTORS = {
+    extractor.name: extractor
+    for extractor in (BeautifulSoupExtractor, LxmlExtractor, SelectolaxExtractor, StreamingExtractor)
+}
+
+
+def get_extractor(name):
+    """Instantiate the extractor backend registered under `name`."""
+    if name not in EXTRACTORS:
+        raise ValueError(f"Unknown extractor '{name}'. Choose from: {', '.join(EXTRACTORS)}")
+    return EXTRACTORS[name]()
+
+
+def extract_article(url, html, backend="beautifulsoup"):
+    """Build an article record from raw HTML; a top-level function so process pools can call it."""
+    title, content = get_extractor(backend).extract(html)
+    return {"url": url, "title": title, "content": content}
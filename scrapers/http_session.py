@@ -0,0 +1,124 @@
+import email.utils
+import random
+import threading
+import time
+from collections import Counter
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+
+
+class CrawlSession:
+    """Shared keep-alive HTTP session with timeouts, jittered retries and transfer counters."""
+
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(self, headers=None, timeout=10, max_retries=3, backoff_factor=1.0, max_backoff=60,
+                 pool_maxsize=16):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+
+        self.session = requests.Session()
+        self.session.headers.update(headers or {})
+        # urllib3 lists only the encodings it can decode here (br needs brotli, zstd needs zstandard)
+        self.session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.stats = Counter()
+        self.stats_lock = threading.Lock()
+
+    def _count(self, **counts):
+        with self.stats_lock:
+            self.stats.update(counts)
+
+    @staticmethod
+    def retry_after_seconds(response):
+        """Parse a Retry-After header given either as seconds or as an HTTP date."""
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        if value.strip().isdigit():
+            return float(value)
+        try:
+            retry_at = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, retry_at.timestamp() - time.time())
+
+    def backoff_delay(self, attempt, response=None):
+        """Full-jitter exponential backoff, raised to the server's Retry-After when it asks for longer."""
+        delay = random.uniform(0, min(self.max_backoff, self.backoff_factor * 2 ** attempt))
+        retry_after = self.retry_after_seconds(response) if response is not None else None
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_backoff))
+        return delay
+
+    def get(self, url, headers=None, timeout=None, **kwargs):
+        """GET `url`, retrying connection errors and 429/5xx responses.
+
+        The last response is returned once retries run out; if every attempt raised, the last
+        exception is re-raised so callers keep handling `requests.exceptions.RequestException`.
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.session.get(url, headers=headers, timeout=timeout or self.timeout, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                self._count(requests=1, errors=1)
+                if attempt == self.max_retries:
+                    raise
+                self._count(retries=1)
+                time.sleep(self.backoff_delay(attempt))
+                continue
+
+            if kwargs.get("stream"):
+                # Streamed bodies are read later by the caller; counting them here would buffer them
+                self._count(requests=1)
+            else:
+                self._count(requests=1, bytes_received=self._wire_bytes(response),
+                            bytes_decoded=len(response.content))
+            if response.status_code not in self.RETRY_STATUSES or attempt == self.max_retries:
+                return response
+            self._count(retries=1, **{f"retries_{response.status_code}": 1})
+            response.close()
+            time.sleep(self.backoff_delay(attempt, response))
+        return response
+
+    @staticmethod
+    def _wire_bytes(response):
+        """Bytes read off the socket (compressed size), falling back to the decoded body size."""
+        try:
+            return response.raw.tell() or len(response.content)
+        except AttributeError:
+            return len(response.content)
+
+    def connection_stats(self):
+        """Count requests and newly opened connections across the session's connection pools."""
+        requests_sent = new_connections = 0
+        # The same adapter is mounted for http:// and https://; count its pools once
+        adapters = {id(adapter): adapter for adapter in self.session.adapters.values()}
+        for adapter in adapters.values():
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools[key]
+                requests_sent += pool.num_requests
+                new_connections += pool.num_connections
+        return requests_sent, new_connections
+
+    def report(self):
+        """Return the per-crawl counters: bytes transferred, connection reuse rate and retries."""
+        requests_sent, new_connections = self.connection_stats()
+        with self.stats_lock:
+            report = dict(self.stats)
+        report["new_connections"] = new_connections
+        report["connection_reuse_rate"] = 1 - new_connections / requests_sent if requests_sent else 0.0
+        if report.get("bytes_decoded"):
+            report["compression_ratio"] = report.get("bytes_received", 0) / report["bytes_decoded"]
+        return report
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,150 @@
+import json
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from scrapers.bbc_scraper import BBCFootballScraper
+from scrapers.extractors import extract_article
+
+_DONE = object()
+
+
+def load_jsonl(filepath):
+    """Yield the records of a JSON Lines file, skipping a torn last line left by a crash."""
+    if not os.path.exists(filepath):
+        return
+    with open(filepath, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def truncate_torn_line(filepath, block_size=65536):
+    """Cut a JSON Lines file back to its last newline, dropping a partial record left by a crash."""
+    if not os.path.exists(filepath):
+        return
+    with open(filepath, "r+b") as f:
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            start = max(0, position - block_size)
+            f.seek(start)
+            newline = f.read(position - start).rfind(b"\n")
+            if newline >= 0:
+                position = start + newline + 1
+                break
+            position = start
+        if position < end:
+            print(f"⚠️ Dropping a torn last line ({end - position} bytes) from `{filepath}`")
+            f.truncate(position)
+
+
+class CrawlPipeline:
+    """Overlapping fetch -> parse -> write crawl.
+
+    Fetcher threads put raw HTML on a bounded queue, a process pool parses it on every core,
+    and a writer thread appends each article to a JSON Lines file as soon as it is parsed.
+    Articles already in the output file are skipped, so a crashed run resumes where it stopped.
+    """
+
+    def __init__(self, scraper, output_file, parse_workers=None, max_pending=64, backend=None):
+        self.scraper = scraper
+        self.output_file = output_file
+        self.parse_workers = parse_workers or os.cpu_count()
+        self.max_pending = max_pending
+        self.backend = backend or scraper.extractor.name
+        self.html_queue = queue.Queue(maxsize=max_pending)
+        self.write_queue = queue.Queue()
+        self.pending = threading.BoundedSemaphore(max_pending)
+        self.written = 0
+        self.parse_errors = 0
+
+    def completed_urls(self):
+        """URLs already written by an earlier (possibly crashed) run."""
+        return {article["url"] for article in load_jsonl(self.output_file)}
+
+    def _fetch(self, url):
+        """Fetcher stage: rate-limited download, raw HTML goes onto the parse queue."""
+        self.scraper.rate_limiter.acquire(url)
+        response = self.scraper.fetch_article(url)
+        if response is not None:
+            self.html_queue.put((url, response.text, response))
+
+    def _fetch_all(self, links):
+        try:
+            with ThreadPoolExecutor(max_workers=self.scraper.concurrency) as executor:
+                list(executor.map(self._fetch, links))
+        finally:
+            self.html_queue.put(_DONE)
+
+    def _write_all(self):
+        """Writer stage: append one JSON line per article and flush so a crash loses nothing written."""
+        truncate_torn_line(self.output_file)  # so the first new record does not join a partial line
+        with open(self.output_file, "a", encoding="utf-8") as f:
+            while True:
+                article = self.write_queue.get()
+                if article is _DONE:
+                    break
+                f.write(json.dumps(article, ensure_ascii=False) + "\n")
+                f.flush()
+                self.scraper.commit_state([article])
+                self.written += 1
+
+    def _on_parsed(self, future, response):
+        self.pending.release()
+        try:
+            article = future.result()
+        except Exception as e:
+            print(f"⚠️ Error parsing {response.url}: {e}")
+            self.parse_errors += 1
+            return
+        article = self.scraper.accept_article(article, response)
+        if article:
+            self.write_queue.put(article)
+
+    def run(self, links=None):
+        """Crawl `links` (or everything found on the category pages) and return the number of articles written."""
+        if links is None:
+            self.scraper.get_article_links_concurrent()
+            links = list(self.scraper.article_links)
+        done = self.completed_urls()
+        links = [link for link in links if link not in done]
+        if self.scraper.limit:
+            links = links[:self.scraper.limit]
+        print(f" Pipeline: {len(links)} articles to crawl ({len(done)} already in `{self.output_file}`), "
+              f"{self.scraper.concurrency} fetchers, {self.parse_workers} parsers")
+
+        writer = threading.Thread(target=self._write_all)
+        fetcher = threading.Thread(target=self._fetch_all, args=(links,))
+        writer.start()
+        fetcher.start()
+
+        with ProcessPoolExecutor(max_workers=self.parse_workers) as parsers:
+            while True:
+                item = self.html_queue.get()
+                if item is _DONE:
+                    break
+                url, html, response = item
+                self.pending.acquire()
+                future = parsers.submit(extract_article, url, html, self.backend)
+                future.add_done_callback(lambda f, response=response: self._on_parsed(f, response))
+
+        fetcher.join()
+        self.write_queue.put(_DONE)
+        writer.join()
+        print(f" Pipeline completed! {self.written} articles appended to `{self.output_file}`")
+        return self.written
+
+
+if __name__ == "__main__":
+    scraper = BBCFootballScraper(limit=None)
+    pipeline = CrawlPipeline(
+        scraper,
+        "/home/shtlp_0060/Desktop/Python Data Scrapping Project/data/football_articles/football_articles.jsonl",
+    )
+    scraper.discover_feed_links()
+    pipeline.run()
+    scraper.crawl_report()
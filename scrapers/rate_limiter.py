@@ -0,0 +1,54 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """Thread-safe token bucket that refills at `rate` tokens per second up to `capacity`."""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def acquire(self):
+        """Block until a token is available, then consume it. Returns the time spent waiting."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait_time = (1 - self.tokens) / self.rate
+            time.sleep(wait_time)
+            waited += wait_time
+
+
+class HostRateLimiter:
+    """Keeps one token bucket per host so every site gets its own request budget."""
+
+    def __init__(self, requests_per_second=4.0, burst=4):
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def bucket_for(self, url):
+        """Return (creating if needed) the token bucket for the host of `url`."""
+        host = urlparse(url).netloc
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = TokenBucket(self.requests_per_second, self.burst)
+            return self.buckets[host]
+
+    def acquire(self, url):
+        """Wait for permission to send a request to the host of `url`."""
+        return self.bucket_for(url).acquire()
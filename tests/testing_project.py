@@ -1,6 +1,12 @@
 import pytest
+import http.server
+import io
 import json
+import re
+import threading
+import requests
 import os
+import time
 import faiss
 import numpy as np
 from unittest.mock import patch, MagicMock , mock_open
@@ -10,9 +16,27 @@ warnings.filterwarnings("ignore")
 
 #  Importing from your project folders
 from scrapers.bbc_scraper import BBCFootballScraper
-from processing.chunking import ArticleChunker
+from scrapers.archive import ArchiveReader, HTMLArchive, reparse_archive
+from scrapers.crawl_state import CrawlStateStore
+from scrapers.discovery import BloomFilter, LinkFrontier
+from scrapers.extractors import get_extractor
+from scrapers.http_session import CrawlSession
+from scrapers.pipeline import CrawlPipeline, load_jsonl
+from scrapers.rate_limiter import HostRateLimiter, TokenBucket
+from processing.chunking import ArticleChunker, iter_json_array
+from processing.dedup import ChunkDeduplicator
+from processing.answer_cache import SemanticAnswerCache
+from processing.chunk_store import ChunkStore, load_chunk_store
+from processing.embedding_cache import EmbeddingCache, text_digest
+from processing.index_utils import (ChunkLookup, assign_chunk_ids, build_index, chunk_id, normalize_vectors,
+                                    query_vectors, read_index, unwrap_index, write_index)
+from processing.query_cache import QueryEmbeddingCache
+from processing.rerank import load_reranker, search_index
+from processing.retrieval_engine import RetrievalEngine
+from processing.text_splitter import RecursiveTextSplitter, TokenBudgetSplitter
 from processing.vectorization import FAISSIndexer
 from processing.retrieval import FootballQnA
+from Testing_Automation.benchmark_scraper import ARTICLES_FILE, build_article_page
 
 #  Test BBC Scraper
 @pytest.fixture
@@ -20,7 +44,7 @@ def scraper():
     return BBCFootballScraper(limit=2)
 
 def test_get_article_links(scraper):
-    with patch("requests.get") as mock_get:
+    with patch.object(scraper.session, "get") as mock_get:
         mock_get.return_value.status_code = 200
         mock_get.return_value.text = '<a class="ssrcss-sxweo-PromoLink" href="/sport/football/articles/test-article"></a>'
         
@@ -29,7 +53,7 @@ def test_get_article_links(scraper):
         assert "https://www.bbc.com/sport/football/articles/test-article" in scraper.article_links
 
 def test_scrape_article(scraper):
-    with patch("requests.get") as mock_get:
+    with patch.object(scraper.session, "get") as mock_get:
         mock_get.return_value.status_code = 200
         mock_get.return_value.text = '<h1>Test Title</h1><article><p>Test Content</p></article>'
         
@@ -37,6 +61,277 @@ def test_scrape_article(scraper):
         assert result["title"] == "Test Title"
         assert "Test Content" in result["content"]
 
+def test_scrape_articles_concurrent(scraper):
+    pages = {
+        "https://www.bbc.com/sport/football/articles/a1": '<h1>Title 1</h1><article><p>Body 1</p></article>',
+        "https://www.bbc.com/sport/football/articles/a2": '<h1>Title 2</h1><article><p>Body 2</p></article>',
+    }
+
+    def fake_get(url, **kwargs):
+        response = MagicMock(status_code=200)
+        response.text = pages.get(url, '<a class="ssrcss-sxweo-PromoLink" href="/sport/football/articles/a1"></a>'
+                                       '<a class="ssrcss-sxweo-PromoLink" href="/sport/football/articles/a2"></a>')
+        return response
+
+    scraper.rate_limiter = HostRateLimiter(requests_per_second=1000, burst=100)
+    with patch.object(scraper.session, "get", side_effect=fake_get):
+        articles = scraper.scrape_articles_concurrent()
+
+    assert sorted(a["title"] for a in articles) == ["Title 1", "Title 2"]
+    assert all(set(a) == {"url", "title", "content"} for a in articles)
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=20, capacity=1)
+    start = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    # first token is free, the other four wait ~1/20 s each
+    assert time.monotonic() - start >= 0.15
+
+def test_incremental_crawl_skips_unchanged(tmp_path):
+    url = "https://www.bbc.com/sport/football/articles/test-article"
+    store = CrawlStateStore(tmp_path / "crawl_state.db")
+    scraper = BBCFootballScraper(state_store=store)
+
+    with patch.object(scraper.session, "get") as mock_get:
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.text = '<h1>Test Title</h1><article><p>Test Content</p></article>'
+        mock_get.return_value.headers = {"ETag": '"v1"'}
+        article = scraper.scrape_article(url)
+        assert article["title"] == "Test Title"
+        # Not seen until it has been written: a crash before merging would fetch it again
+        assert store.get(url) is None
+        scraper.scraped_articles.append(article)
+        scraper.merge_articles(tmp_path / "articles.json")
+        assert store.get(url)["etag"] == '"v1"'
+
+        # Same content again: recorded but not emitted
+        assert scraper.scrape_article(url) is None
+        assert mock_get.call_args.kwargs["headers"]["If-None-Match"] == '"v1"'
+
+        mock_get.return_value.status_code = 304
+        assert scraper.scrape_article(url) is None
+
+    assert scraper.crawl_status == {"new": 1, "unchanged": 1, "not_modified": 1}
+
+def test_archive_keeps_only_new_or_changed_pages(tmp_path):
+    url = "https://www.bbc.com/sport/football/articles/test-article"
+    archive = HTMLArchive(str(tmp_path / "pages.warc.zst"))
+    scraper = BBCFootballScraper(state_store=CrawlStateStore(tmp_path / "crawl_state.db"), archive=archive)
+
+    with patch.object(scraper.session, "get") as mock_get:
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.headers = {}
+        for body in ("v1", "v1", "v2"):
+            mock_get.return_value.text = f'<h1>Title</h1><article><p>{body}</p></article>'
+            article = scraper.scrape_article(url)
+            if article:
+                scraper.commit_state([article])
+
+    assert archive.records == 2  # the unchanged second fetch is not archived again
+    archive.close()
+
+def test_save_delta_and_merge(scraper, tmp_path):
+    articles_file = tmp_path / "articles.json"
+    with open(articles_file, "w", encoding="utf-8") as f:
+        json.dump([{"url": "u1", "title": "Old", "content": "Old"}, {"url": "u2", "title": "Keep", "content": "Keep"}], f)
+
+    scraper.scraped_articles = [{"url": "u1", "title": "New", "content": "New"}, {"url": "u3", "title": "Added", "content": "Added"}]
+    scraper.save_delta(tmp_path / "delta.json")
+    scraper.merge_articles(articles_file)
+
+    with open(tmp_path / "delta.json", "r", encoding="utf-8") as f:
+        assert len(json.load(f)) == 2
+    with open(articles_file, "r", encoding="utf-8") as f:
+        assert [a["title"] for a in json.load(f)] == ["New", "Keep", "Added"]
+
+def make_response(status_code, headers=None, content=b"ok"):
+    response = MagicMock(status_code=status_code, headers=headers or {}, content=content)
+    response.raw.tell.return_value = len(content)
+    return response
+
+def test_crawl_session_retries_and_honours_retry_after():
+    session = CrawlSession(max_retries=3)
+    responses = [make_response(429, {"Retry-After": "2"}), make_response(503), make_response(200)]
+
+    with patch.object(session.session, "get", side_effect=responses) as mock_get, \
+         patch("scrapers.http_session.time.sleep") as mock_sleep:
+        response = session.get("https://www.bbc.com/sport/football")
+
+    assert response.status_code == 200
+    assert mock_get.call_count == 3
+    assert mock_sleep.call_args_list[0].args[0] >= 2
+    report = session.report()
+    assert report["retries"] == 2 and report["retries_429"] == 1 and report["retries_503"] == 1
+    assert report["bytes_received"] == 3 * len(b"ok")
+
+def test_crawl_session_gives_up_after_max_retries():
+    session = CrawlSession(max_retries=2)
+    with patch.object(session.session, "get", side_effect=requests.exceptions.ConnectionError("down")), \
+         patch("scrapers.http_session.time.sleep"):
+        with pytest.raises(requests.exceptions.RequestException):
+            session.get("https://www.bbc.com/sport/football")
+    assert session.report()["errors"] == 3
+
+def test_crawl_session_counts_each_connection_once():
+    class KeepAliveHandler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"ok")
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        session = CrawlSession()
+        for _ in range(4):
+            session.get(f"http://127.0.0.1:{server.server_port}/")
+        assert session.connection_stats() == (4, 1)
+    finally:
+        server.shutdown()
+
+def test_crawl_pipeline_appends_jsonl_and_resumes(scraper, tmp_path):
+    output_file = tmp_path / "articles.jsonl"
+    links = [f"https://www.bbc.com/sport/football/articles/a{i}" for i in range(4)]
+
+    def fake_get(url, **kwargs):
+        response = MagicMock(status_code=200, url=url)
+        response.text = f'<h1>Title {url[-1]}</h1><article><p>Body</p></article>'
+        return response
+
+    scraper.limit = None
+    scraper.rate_limiter = HostRateLimiter(requests_per_second=1000, burst=100)
+    with patch.object(scraper.session, "get", side_effect=fake_get):
+        assert CrawlPipeline(scraper, output_file, parse_workers=2).run(links[:3]) == 3
+        # A second run only fetches what is not in the file yet
+        assert CrawlPipeline(scraper, output_file, parse_workers=2).run(links) == 1
+
+    articles = list(load_jsonl(output_file))
+    assert sorted(a["title"] for a in articles) == ["Title 0", "Title 1", "Title 2", "Title 3"]
+
+def test_crawl_pipeline_resumes_after_torn_line(scraper, tmp_path):
+    output_file = tmp_path / "articles.jsonl"
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"url": "u0", "title": "T0", "content": "Body"}) + "\n" + '{"url": "u1", "ti')
+
+    def fake_get(url, **kwargs):
+        response = MagicMock(status_code=200, url=url)
+        response.text = f'<h1>T{url[-1]}</h1><article><p>Body</p></article>'
+        return response
+
+    links = [f"https://www.bbc.com/sport/football/articles/a{i}" for i in (1, 2)]
+    scraper.rate_limiter = HostRateLimiter(requests_per_second=1000, burst=100)
+    with patch.object(scraper.session, "get", side_effect=fake_get):
+        assert CrawlPipeline(scraper, output_file, parse_workers=1).run(links) == 2
+
+    assert sorted(a["title"] for a in load_jsonl(output_file)) == ["T0", "T1", "T2"]
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=5000, error_rate=0.01)
+    urls = [f"https://www.bbc.com/sport/football/articles/c{i}" for i in range(5000)]
+    for url in urls:
+        bloom.add(url)
+
+    assert all(url in bloom for url in urls)
+    false_positives = sum(f"https://www.bbc.com/other/{i}" in bloom for i in range(5000))
+    assert false_positives < 5000 * 0.03
+
+def test_link_frontier_spools_to_disk(tmp_path):
+    frontier = LinkFrontier(capacity=100, spool_path=tmp_path / "links.txt")
+    assert frontier.add("https://www.bbc.com/a") and frontier.add("https://www.bbc.com/b")
+    assert not frontier.add("https://www.bbc.com/a")
+
+    assert len(frontier) == 2
+    assert list(frontier) == ["https://www.bbc.com/a", "https://www.bbc.com/b"]
+
+    default = LinkFrontier(capacity=100)  # spools to a temporary file by default
+    default.update(["https://www.bbc.com/a", "https://www.bbc.com/a", "https://www.bbc.com/b"])
+    assert list(default) == ["https://www.bbc.com/a", "https://www.bbc.com/b"]
+    assert not hasattr(default, "links") and os.path.exists(default.spool_path)
+    default.close()
+    assert not os.path.exists(default.spool_path)
+
+def test_discover_feed_links_follows_sitemap_index(scraper):
+    feeds = {
+        "https://www.bbc.com/sitemap.xml": b'<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+            b'<sitemap><loc>https://www.bbc.com/sitemap-1.xml</loc></sitemap></sitemapindex>',
+        "https://www.bbc.com/sitemap-1.xml": b'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+            b'<url><loc>https://www.bbc.co.uk/sport/football/articles/abc</loc></url>'
+            b'<url><loc>https://www.bbc.com/news/articles/xyz</loc></url></urlset>',
+        "https://feeds.bbci.co.uk/sport/football/rss.xml": b'<rss><channel><link>https://www.bbc.co.uk/sport/football</link>'
+            b'<item><link>https://www.bbc.co.uk/sport/football/articles/def?at_medium=RSS</link></item></channel></rss>',
+    }
+
+    def fake_get(url, **kwargs):
+        return MagicMock(status_code=200, raw=io.BytesIO(feeds[url]))
+
+    with patch.object(scraper.session, "get", side_effect=fake_get):
+        scraper.discover_feed_links(["https://www.bbc.com/sitemap.xml", "https://feeds.bbci.co.uk/sport/football/rss.xml"])
+
+    assert sorted(scraper.article_links) == [
+        "https://www.bbc.com/sport/football/articles/abc",
+        "https://www.bbc.com/sport/football/articles/def",
+    ]
+
+def test_html_archive_roundtrip_and_reparse(tmp_path):
+    archive_path = str(tmp_path / "pages.warc.zst")
+    archive = HTMLArchive(archive_path)
+    archive.append("https://www.bbc.com/a", "<h1>Old</h1><article><p>v1</p></article>", {"ETag": '"1"'})
+    archive.append("https://www.bbc.com/b", "<h1>Béla</h1><article><p>Body B</p></article>")
+    archive.append("https://www.bbc.com/a", "<h1>New</h1><article><p>v2</p></article>")
+    archive.close()
+
+    reader = ArchiveReader(archive_path)
+    url, headers, html = reader.read(0)
+    assert url == "https://www.bbc.com/a" and headers["ETag"] == '"1"' and "v1" in html
+    reader.close()
+
+    articles = reparse_archive(archive_path, tmp_path / "articles.json", workers=2)
+    assert [(a["url"], a["title"]) for a in articles] == [("https://www.bbc.com/b", "Béla"), ("https://www.bbc.com/a", "New")]
+
+PARITY_PAGES = [
+    '<h1>Test Title</h1><article><p>Test Content</p></article>',
+    '<div><h1>Title <b>bold</b></h1></div><p>outside</p><article><p>One &amp; <a href="#">two</a></p><p>  </p><p>x<br>y</p></article>',
+    '<article><p>text<script>var x = 1;</script> more<!-- comment --></p></article>',
+    '<html><body><p>No article here</p></body></html>',
+]
+# Block elements inside <p>: lxml and selectolax close the paragraph early, so only "streaming" matches
+BLOCK_IN_PARAGRAPH_PAGES = [
+    '<h1>T</h1><article><p>Intro <div>quote</div> tail</p></article>',
+    '<h1>T</h1><article><p>a<ul><li>x</li></ul>b</p></article>',
+]
+
+@pytest.mark.parametrize("backend", ["lxml", "selectolax", "streaming"])
+def test_extractor_parity_with_beautifulsoup(backend):
+    reference = get_extractor("beautifulsoup")
+    try:
+        extractor = get_extractor(backend)
+    except ImportError:
+        pytest.skip(f"{backend} is not installed")
+    with open(ARTICLES_FILE, "r", encoding="utf-8") as f:
+        canned = [build_article_page(article) for article in json.load(f)[:20]]
+
+    pages = PARITY_PAGES + canned
+    if backend == "streaming":
+        pages += BLOCK_IN_PARAGRAPH_PAGES
+    for html in pages:
+        assert extractor.extract(html) == reference.extract(html)
+
+def test_default_extractor_is_beautifulsoup():
+    # Content hashes in the crawl state were computed with BeautifulSoup; another default would mark every article changed
+    assert BBCFootballScraper().extractor.name == "beautifulsoup"
+    assert get_extractor("beautifulsoup").extract(BLOCK_IN_PARAGRAPH_PAGES[1]) == ("T", "axb")
+
+def test_get_extractor_unknown_backend():
+    with pytest.raises(ValueError):
+        get_extractor("regex")
+
 #  Test Chunking
 @pytest.fixture
 def chunker(tmp_path):
@@ -57,6 +352,185 @@ def test_chunk_articles(chunker):
     assert len(chunks) > 0
     assert "Test Article" in chunks[0]["title"]
 
+def test_chunk_articles_streaming_jsonl_matches_json(tmp_path):
+    articles = [{"title": f"Article {i}", "url": f"u{i}", "content": f"Sentence number {i}. " * 80} for i in range(5)]
+    json_file = tmp_path / "articles.json"
+    with open(json_file, "w", encoding="utf-8") as f:
+        json.dump(articles, f, indent=4)
+
+    ArticleChunker(json_file, tmp_path / "chunks.json").chunk_articles()
+    ArticleChunker(json_file, tmp_path / "chunks.jsonl").chunk_articles()
+
+    with open(tmp_path / "chunks.json", "r", encoding="utf-8") as f:
+        expected = json.load(f)
+    with open(tmp_path / "chunks.jsonl", "r", encoding="utf-8") as f:
+        lines = f.readlines()
+    assert [json.loads(line) for line in lines] == expected
+    assert ": " not in lines[0]  # compact separators
+
+def test_chunking_skips_bad_jsonl_lines_and_keeps_old_output_on_error(tmp_path):
+    jsonl_file = tmp_path / "articles.jsonl"
+    with open(jsonl_file, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"title": "A", "url": "u1", "content": "First article. " * 10}) + "\n")
+        f.write('{"title": "broken", "content": \n')
+        f.write(json.dumps({"title": "B", "url": "u2", "content": "Second article. " * 10}) + "\n")
+    chunker = ArticleChunker(jsonl_file, tmp_path / "chunks.jsonl")
+    chunker.chunk_articles()
+    assert chunker.bad_records == 1
+    assert [c["title"] for c in load_jsonl(tmp_path / "chunks.jsonl")] == ["A", "B"]
+
+    # A broken JSON array cannot be resumed past: the previous output must survive
+    array_file = tmp_path / "articles.json"
+    with open(array_file, "w", encoding="utf-8") as f:
+        f.write('[{"title": "A", "url": "u1", "content": "First."}, {"title": oops}]')
+    for name in ("chunks.json", "chunks.jsonl"):
+        with open(tmp_path / name, "w", encoding="utf-8") as f:
+            f.write("previous")
+        ArticleChunker(array_file, tmp_path / name).chunk_articles()
+        with open(tmp_path / name, "r", encoding="utf-8") as f:
+            assert f.read() == "previous"
+        assert not os.path.exists(tmp_path / f"{name}.tmp")
+
+def test_parallel_chunking_matches_serial(tmp_path):
+    articles = [{"title": f"Article {i}", "url": f"u{i}", "content": f"Sentence number {i}. " * (20 + i)} for i in range(30)]
+    json_file = tmp_path / "articles.json"
+    with open(json_file, "w", encoding="utf-8") as f:
+        json.dump(articles, f)
+    serial = list(ArticleChunker(json_file, None).iter_chunks())
+    parallel = list(ArticleChunker(json_file, None, workers=2, batch_size=4).iter_chunks())
+    assert parallel == serial
+
+@pytest.mark.parametrize("chunk_size,chunk_overlap", [(500, 50), (40, 10), (7, 0)])
+def test_native_splitter_matches_langchain(chunk_size, chunk_overlap):
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    with open(ARTICLES_FILE, "r", encoding="utf-8") as f:
+        texts = [article["content"] for article in json.load(f)[:20]]
+    texts += ["", "   ", "\n\nLeading separators.\n Mixed  spacing\n\n\nand " + "unbreakablewordthatislong" * 3]
+    reference = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    native = RecursiveTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    for text in texts + [ArticleChunker.clean_text(t) for t in texts]:
+        assert native.split_text(text) == reference.split_text(text)
+
+class WhitespaceTokenizer:
+    """Minimal stand-in for a Hugging Face fast tokenizer: one token per word, two special tokens."""
+
+    def num_special_tokens_to_add(self, pair=False):
+        return 2
+
+    def __call__(self, texts, add_special_tokens=False, return_offsets_mapping=False):
+        offsets = [[m.span() for m in re.finditer(r"\S+", text)] for text in texts]
+        return {"input_ids": [[0] * len(o) for o in offsets], "offset_mapping": offsets}
+
+
+def test_token_budget_chunking_fills_model_window(tmp_path):
+    sentence = "The striker scored a late winner at Anfield."  # 8 tokens
+    articles = [{"title": "T", "url": "u", "content": " ".join([sentence] * 10) + " " + "word " * 30}]
+    json_file = tmp_path / "articles.json"
+    with open(json_file, "w", encoding="utf-8") as f:
+        json.dump(articles, f)
+
+    chunker = ArticleChunker(json_file, None, chunk_tokens=20, tokenizer=WhitespaceTokenizer(), dedup=False)
+    chunks = [chunk["content"] for chunk in chunker.iter_chunks()]
+
+    assert all(len(chunk.split()) <= 18 for chunk in chunks)  # 20 minus [CLS] and [SEP]
+    assert chunks[0] == " ".join([sentence] * 2)  # whole sentences, packed up to the budget
+    assert " ".join(chunks).split() == chunker.clean_text(articles[0]["content"]).split()
+    assert len(chunks) == 5 + 2  # 5 pairs of sentences, then the 30-word run cut at 18 tokens
+
+
+def test_token_budget_overlap_carries_sentences():
+    splitter = TokenBudgetSplitter(WhitespaceTokenizer(), max_tokens=12, overlap_tokens=4)
+    chunks = splitter.split_text("One two three. Four five six. Seven eight nine. Ten eleven twelve.")
+    assert chunks == ["One two three. Four five six. Seven eight nine.",
+                      "Seven eight nine. Ten eleven twelve."]
+
+def test_deduplicator_drops_exact_and_near_duplicates():
+    with open(ARTICLES_FILE, "r", encoding="utf-8") as f:
+        texts = [article["content"][:1500] for article in json.load(f)[:10]]
+    dedup = ChunkDeduplicator()
+
+    assert not any(dedup.is_duplicate(text) for text in texts)
+    assert dedup.check("  " + texts[0].upper() + "\n") == "exact"
+    assert dedup.check(texts[1].replace(" the ", " a ", 1)) == "near"
+    assert dedup.report() == {"kept": 10, "exact": 1, "near": 1}
+
+def test_deduplicator_finds_near_duplicates_after_band_index_merges():
+    with open(ARTICLES_FILE, "r", encoding="utf-8") as f:
+        texts = [article["content"][:1500] for article in json.load(f)[:40]]
+    dedup = ChunkDeduplicator()
+    dedup.band_index.MIN_MERGE = 64  # merge every couple of texts
+
+    kept = [text for text in texts if not dedup.is_duplicate(text)]
+    index = dedup.band_index
+    assert len(index.keys) > 0 and len(index.keys) + index.recent_count == len(kept) * dedup.bands
+    assert np.all(index.keys[:-1] <= index.keys[1:])
+    assert dedup.check(kept[0].replace(" the ", " a ", 1)) == "near"
+    assert dedup.check(kept[-1].replace(" the ", " a ", 1)) == "near"
+
+
+def test_chunker_dedup_skips_repeated_articles_and_chunks(tmp_path):
+    boilerplate = "This video can not be played. Watch the highlights on BBC iPlayer now."
+    articles = [
+        {"title": "A", "url": "a", "content": "Arsenal beat Chelsea in a tight London derby. " * 20},
+        {"title": "A copy", "url": "a2", "content": "Arsenal beat Chelsea in a tight London derby. " * 20},
+        {"title": "B", "url": "b", "content": boilerplate},
+        {"title": "C", "url": "c", "content": boilerplate},
+    ]
+    json_file = tmp_path / "articles.json"
+    with open(json_file, "w", encoding="utf-8") as f:
+        json.dump(articles, f)
+
+    kept = list(ArticleChunker(json_file, None).iter_chunks())
+    everything = list(ArticleChunker(json_file, None, dedup=False).iter_chunks())
+    assert {chunk["url"] for chunk in kept} == {"a", "b"}
+    assert len(set(chunk["content"] for chunk in kept)) == len(kept) < len(everything)
+
+def test_iter_json_array_across_block_boundaries():
+    data = [{"title": "a]b", "content": "x" * 50}, {"title": "c", "content": "y"}, [1, 2]]
+    text = json.dumps(data, indent=4)
+    for block_size in (1, 7, 64, 1 << 16):
+        assert list(iter_json_array(io.StringIO(text), block_size)) == data
+
+def test_chunk_store_round_trip_and_json_fallback(tmp_path):
+    chunks = [{"title": "Derby", "url": "https://bbc.co.uk/a", "content": f"Chunk {i} – Müller scored."} for i in range(3)]
+    chunks.append({"title": "Other", "url": "https://bbc.co.uk/b", "content": "Last chunk."})
+    chunked_file = tmp_path / "football_chunks.json"
+    with open(chunked_file, "w", encoding="utf-8") as f:
+        json.dump(chunks, f)
+    store_dir = tmp_path / "chunk_store"
+
+    assert load_chunk_store(str(store_dir), chunked_file) == chunks  # not built yet: JSON fallback
+    assert ChunkStore.build(chunks, str(store_dir)) == 4
+
+    store = load_chunk_store(str(store_dir), chunked_file)
+    assert isinstance(store, ChunkStore)
+    assert len(store) == 4 and list(store) == chunks
+    assert store[-1] == chunks[-1] and store.content(1) == chunks[1]["content"]
+    assert len(store.strings) == 4  # two titles and two urls, interned
+    assert list(store.ids) == assign_chunk_ids(chunks)  # the same ids the FAISS index is built with
+    with pytest.raises(IndexError):
+        store[4]
+    store.close()
+
+def test_chunk_store_rebuild_does_not_disturb_open_readers(tmp_path):
+    store_dir = str(tmp_path / "chunk_store")
+    old = [{"title": "T", "url": f"u{i}", "content": f"old chunk {i}"} for i in range(500)]
+    ChunkStore.build(old, store_dir)
+    reader = ChunkStore(store_dir)
+
+    ChunkStore.build([{"title": "T", "url": "u0", "content": "new"}], store_dir)
+    assert reader[499]["content"] == "old chunk 499"  # still the files it mapped
+    assert list(ChunkStore(store_dir)) == [{"title": "T", "url": "u0", "content": "new"}]
+    assert not [name for name in os.listdir(store_dir) if name.endswith(".tmp")]
+    reader.close()
+
+    # Files from different builds (a store opened mid-swap) are refused rather than misread
+    with open(os.path.join(store_dir, "content.bin"), "wb") as f:
+        f.write(b"x" * 10)
+    with pytest.raises(ValueError):
+        ChunkStore(store_dir)
+
 #  Test FAISS Indexing
 @pytest.fixture
 def indexer(tmp_path):
@@ -81,6 +555,328 @@ def test_load_faiss_index(indexer):
 
     assert index is not None
 
+def test_embedding_writes_memmap_in_original_order(tmp_path):
+    texts = ["short", "a much longer chunk of text", "mid length one", "x"]
+    chunked_file = tmp_path / "chunks.json"
+    with open(chunked_file, "w", encoding="utf-8") as f:
+        json.dump([{"content": text} for text in texts], f)
+
+    model = MagicMock()
+    model.encode.side_effect = lambda block, batch_size: np.array([[len(t), 1.0] for t in block], dtype="float32")
+    with patch("processing.vectorization.SentenceTransformer", return_value=model):
+        indexer = FAISSIndexer(str(chunked_file), str(tmp_path / "faiss_index"), batch_size=2, write_batch=3)
+    indexer.create_faiss_index()
+
+    vectors = np.load(indexer.vectors_file, mmap_mode="r")
+    assert vectors[:, 0].tolist() == [len(t) for t in texts]
+    assert [len(call.args[0]) for call in model.encode.call_args_list] == [3, 1]
+    assert model.encode.call_args_list[0].args[0][0] == "a much longer chunk of text"  # longest first
+    assert faiss.read_index(indexer.vector_db_path).ntotal == len(texts)
+
+def test_embedding_cache_survives_reopen_and_torn_write(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "all-MiniLM-L6-v2")
+    digests = [text_digest(t) for t in ("a", "b", "c")]
+    cache.add(digests[:2], np.array([[1, 1], [2, 2]], dtype="float32"))
+    with open(cache.vectors_path, "ab") as f:
+        f.write(b"\x00" * 3)  # half-written row from a crash
+
+    reopened = EmbeddingCache(str(tmp_path), "all-MiniLM-L6-v2")
+    assert reopened.lookup(digests).tolist() == [0, 1, -1]
+    assert reopened.get([0, 1]).tolist() == [[1, 1], [2, 2]]  # the torn row is not mapped
+    cache.refresh()
+    with open(cache.vectors_path, "ab") as f:
+        f.write(b"\x00" * 5)  # another process mid-append: vectors written, digests not yet
+    assert cache.get([1]).tolist() == [[2, 2]]
+    reopened.add(digests[1:], np.array([[9, 9], [3, 3]], dtype="float32"))
+    assert reopened.get(reopened.lookup(digests)).tolist() == [[1, 1], [2, 2], [3, 3]]
+    assert len(EmbeddingCache(str(tmp_path), "other-model")) == 0
+
+
+def test_indexer_only_embeds_unseen_chunks(tmp_path):
+    chunked_file = tmp_path / "chunks.json"
+    model = MagicMock()
+    model.encode.side_effect = lambda block, batch_size: np.array([[len(t), 0.5] for t in block], dtype="float32")
+
+    for texts in (["first chunk", "second"], ["first chunk", "second", "a new one"]):
+        with open(chunked_file, "w", encoding="utf-8") as f:
+            json.dump([{"content": text} for text in texts], f)
+        with patch("processing.vectorization.SentenceTransformer", return_value=model):
+            indexer = FAISSIndexer(str(chunked_file), str(tmp_path / "faiss_index"), cache_dir=str(tmp_path / "cache"))
+        model.encode.reset_mock()
+        indexer.create_faiss_index()
+
+    assert [call.args[0] for call in model.encode.call_args_list] == [["a new one"]]
+    assert np.load(indexer.vectors_file)[:, 0].tolist() == [11, 6, 9]
+
+def test_sync_faiss_index_upserts_and_removes_by_stable_id(tmp_path):
+    chunked_file = tmp_path / "chunks.json"
+    model = MagicMock()
+    model.encode.side_effect = lambda block, batch_size: np.array([[len(t), t.count("a")] for t in block], dtype="float32")
+    chunks = [{"url": "u1", "content": "alpha"}, {"url": "u1", "content": "beta"}, {"url": "u2", "content": "gamma"}]
+    with open(chunked_file, "w", encoding="utf-8") as f:
+        json.dump(chunks, f)
+    with patch("processing.vectorization.SentenceTransformer", return_value=model):
+        indexer = FAISSIndexer(str(chunked_file), str(tmp_path / "faiss_index"))
+    indexer.create_faiss_index()
+
+    updated = [{"url": "u1", "content": "alpha"}, {"url": "u1", "content": "banana bread"}, {"url": "u3", "content": "delta"}]
+    with open(chunked_file, "w", encoding="utf-8") as f:
+        json.dump(updated, f)
+    model.encode.reset_mock()
+    index = indexer.sync_faiss_index()
+
+    assert [call.args[0] for call in model.encode.call_args_list] == [["banana bread", "delta"]]
+    assert sorted(faiss.vector_to_array(index.id_map).tolist()) == sorted(assign_chunk_ids(updated))
+    assert indexer.check_consistency()["ok"]
+    _, ids = index.search(np.array([[12, 4]], dtype="float32"), 1)
+    assert ids[0][0] == chunk_id("u1", 1)
+    assert ChunkLookup(updated, index).contents(ids[0]) == ["banana bread"]
+
+    store_dir = str(tmp_path / "chunk_store")
+    ChunkStore.build(updated, store_dir)
+    store = ChunkStore(store_dir)
+    assert ChunkLookup(store, index).contents(ids[0]) == ["banana bread"]
+    assert store.row_for_id(chunk_id("u2", 0)) is None
+    store.close()
+
+def test_sync_faiss_index_keeps_index_when_chunks_are_unreadable(tmp_path):
+    chunked_file = tmp_path / "chunks.json"
+    model = MagicMock()
+    model.encode.side_effect = lambda block, batch_size: np.array([[len(t), 1] for t in block], dtype="float32")
+    with open(chunked_file, "w", encoding="utf-8") as f:
+        json.dump([{"url": "u1", "content": "alpha"}, {"url": "u2", "content": "beta"}], f)
+    with patch("processing.vectorization.SentenceTransformer", return_value=model):
+        indexer = FAISSIndexer(str(chunked_file), str(tmp_path / "faiss_index"))
+    indexer.create_faiss_index()
+
+    for broken in ('[{"url": "u1", "content": "alp', "[]"):  # truncated file, then an empty one
+        with open(chunked_file, "w", encoding="utf-8") as f:
+            f.write(broken)
+        assert indexer.sync_faiss_index() is None
+        assert faiss.read_index(indexer.vector_db_path).ntotal == 2
+
+    np.save(indexer.vectors_file, np.zeros((5, 2), dtype="float32"))  # out of step with the manifest: re-created from nothing
+    assert indexer.sync_faiss_index(allow_empty=True).ntotal == 0
+    assert not os.path.exists(indexer.vectors_file)
+
+@pytest.mark.parametrize("spec", ["IVF2,Flat", "HNSW8"])
+def test_index_spec_builds_trained_index_and_syncs(tmp_path, spec):
+    chunked_file = tmp_path / "chunks.json"
+    chunks = [{"url": f"u{i}", "content": "x" * (i + 1)} for i in range(40)]
+    with open(chunked_file, "w", encoding="utf-8") as f:
+        json.dump(chunks, f)
+    model = MagicMock()
+    model.encode.side_effect = lambda block, batch_size: np.array([[len(t), len(t) % 7, 1, 0] for t in block], dtype="float32")
+    with patch("processing.vectorization.SentenceTransformer", return_value=model):
+        indexer = FAISSIndexer(str(chunked_file), str(tmp_path / "faiss_index"), index_spec=spec, nprobe=2, ef_search=32)
+    index = indexer.create_faiss_index()
+
+    inner = unwrap_index(faiss.read_index(indexer.vector_db_path))
+    assert (inner.nprobe == 2) if spec.startswith("IVF") else (inner.hnsw.efSearch == 32)
+    _, ids = index.search(np.array([[5, 5, 1, 0]], dtype="float32"), 1)
+    assert ids[0][0] == chunk_id("u4", 0)
+
+    with open(chunked_file, "w", encoding="utf-8") as f:
+        json.dump(chunks[1:], f)  # removing a chunk: HNSW cannot delete, so it is rebuilt
+    assert indexer.sync_faiss_index().ntotal == 39
+    assert indexer.check_consistency()["ok"]
+
+@pytest.mark.parametrize("spec", ["Flat", "SQ8"])
+def test_inner_product_index_normalizes_vectors_and_queries(tmp_path, spec):
+    chunked_file = tmp_path / "chunks.json"
+    chunks = [{"url": "u1", "content": "short"}, {"url": "u2", "content": "a much longer chunk"}]
+    with open(chunked_file, "w", encoding="utf-8") as f:
+        json.dump(chunks, f)
+    model = MagicMock()
+    model.encode.side_effect = lambda block, batch_size: np.array(
+        [[1.0, 0.0] if t == "short" else [20.0, 2.0] for t in block], dtype="float32")
+    with patch("processing.vectorization.SentenceTransformer", return_value=model):
+        l2 = FAISSIndexer(str(chunked_file), str(tmp_path / "faiss_index"), metric="l2")
+        l2.create_faiss_index()
+        indexer = FAISSIndexer(str(chunked_file), str(tmp_path / "faiss_index"), index_spec=spec)
+    index = indexer.sync_faiss_index()  # the saved L2 index is rebuilt for the new metric
+
+    assert index.metric_type == faiss.METRIC_INNER_PRODUCT
+    assert np.allclose(np.linalg.norm(unwrap_index(index).reconstruct_n(0, 2), axis=1), 1, atol=0.02)
+    assert np.load(indexer.vectors_file)[:, 0].tolist() == [1.0, 20.0]  # raw model output is kept
+
+    # the query points the same way as the long chunk but lies nearer the short one: L2 would pick "short"
+    query = query_vectors(index, np.array([[2.0, 0.2]], dtype="float32"))
+    assert np.isclose(np.linalg.norm(query), 1)
+    _, ids = index.search(query, 1)
+    assert ChunkLookup(chunks, index).contents(ids[0]) == ["a much longer chunk"]
+    assert query_vectors(faiss.IndexFlatL2(2), [[30.0, 3.0]]).tolist() == [[30.0, 3.0]]
+
+def test_compressed_index_reranks_from_memmap_after_sync(tmp_path):
+    chunked_file = tmp_path / "chunks.json"
+    rng = np.random.default_rng(0)
+    table = {f"chunk {i}": rng.normal(size=8).astype("float32") for i in range(300)}
+    chunks = [{"url": f"u{i}", "content": f"chunk {i}"} for i in range(300)]
+    with open(chunked_file, "w", encoding="utf-8") as f:
+        json.dump(chunks, f)
+    model = MagicMock()
+    model.encode.side_effect = lambda block, batch_size: np.array([table[t] for t in block], dtype="float32")
+    with patch("processing.vectorization.SentenceTransformer", return_value=model):
+        indexer = FAISSIndexer(str(chunked_file), str(tmp_path / "faiss_index"), index_spec="pq")
+    index = indexer.create_faiss_index()
+    assert unwrap_index(index).pq.M == 1  # "pq": one byte per 8 dimensions
+
+    table["chunk 7 (edited)"] = table["chunk 7"] * -1
+    edited = chunks[:7] + [{"url": "u7", "content": "chunk 7 (edited)"}] + chunks[8:299]
+    with open(chunked_file, "w", encoding="utf-8") as f:
+        json.dump(edited, f)
+    index = indexer.sync_faiss_index()
+    assert np.load(indexer.vectors_file).tolist() == [table[c["content"]].tolist() for c in edited]
+
+    reranker = load_reranker(index, indexer.vector_db_path, factor=60)  # 300 candidates: every vector is re-scored
+    vectors = normalize_vectors([table[c["content"]] for c in edited])
+    queries = normalize_vectors(rng.normal(size=(20, 8)))
+    _, found = search_index(index, queries, 5, reranker)
+    exact = np.argsort(-(queries @ vectors.T), axis=1)[:, :5]
+    assert found.tolist() == [[assign_chunk_ids(edited)[row] for row in rows] for rows in exact]
+    assert load_reranker(faiss.read_index(indexer.vector_db_path), str(tmp_path / "missing")) is None
+
+    # Same chunks in another order (e.g. a reparse): the vectors file must follow the manifest's new order
+    reordered = edited[::-1]
+    with open(chunked_file, "w", encoding="utf-8") as f:
+        json.dump(reordered, f)
+    model.encode.reset_mock()
+    index = indexer.sync_faiss_index()
+    assert not model.encode.called
+    assert np.load(indexer.vectors_file).tolist() == [table[c["content"]].tolist() for c in reordered]
+    scores, found = search_index(index, queries, 5, load_reranker(index, indexer.vector_db_path, factor=60))
+    assert found.tolist() == [[assign_chunk_ids(edited)[row] for row in rows] for rows in exact]
+    assert np.allclose(scores, np.take_along_axis(queries @ vectors.T, exact, axis=1), atol=1e-5)
+
+@pytest.mark.parametrize("spec", ["Flat", "sq8", "HNSW8", "IVF2,Flat"])
+def test_mmap_index_matches_heap_copy_and_survives_rewrite(tmp_path, spec):
+    path = str(tmp_path / "faiss_index")
+    vectors = normalize_vectors(np.random.default_rng(0).normal(size=(60, 8)))
+    queries = vectors[:5] + 0.01
+    index = build_index(spec, 8, vectors, metric="ip")
+    index.add_with_ids(vectors, np.arange(100, 160))
+    write_index(index, path)
+
+    mapped = read_index(path, mmap=True)
+    expected = index.search(queries, 3)
+    assert np.array_equal(mapped.search(queries, 3)[1], expected[1])
+    write_index(build_index("Flat", 8), path)  # the indexer replacing the file while a server has it mapped
+    assert np.array_equal(mapped.search(queries, 3)[1], expected[1])
+    assert read_index(path, mmap=True).ntotal == 0
+
+def test_read_index_warns_when_faiss_cannot_map_flat_storage(tmp_path, monkeypatch, capsys):
+    path = str(tmp_path / "faiss_index")
+    index = build_index("Flat", 4)
+    index.add_with_ids(normalize_vectors(np.eye(4)), np.arange(4))
+    write_index(index, path)
+    monkeypatch.delattr(faiss, "IO_FLAG_MMAP_IFC", raising=False)  # faiss < 1.11
+
+    assert read_index(path, mmap=True).ntotal == 4
+    assert "IO_FLAG_MMAP_IFC" in capsys.readouterr().out
+
+def test_retrieval_engine_batches_queries_and_coalesces_concurrent_searches():
+    table = {"goal": [1.0, 0.0], "save": [0.0, 1.0], "foul": [0.7, 0.7], "corner": [0.9, 0.1]}
+    chunks = [{"content": text} for text in ("goal", "save", "foul")]
+    index = faiss.IndexFlatIP(2)
+    index.add(normalize_vectors([table[c["content"]] for c in chunks]))
+    calls, release = [], threading.Event()
+
+    def encode(queries, batch_size):
+        calls.append(list(queries))
+        if len(calls) == 1:
+            release.wait(5)  # hold the first search so the other threads queue up behind it
+        return np.array([table[q] for q in queries], dtype="float32")
+
+    model = MagicMock()
+    model.encode.side_effect = encode
+    engine = RetrievalEngine(model, index, chunks)
+    release.set()
+    assert engine.search_batch(["save", "corner"], 2) == [["save", "foul"], ["goal", "foul"]]
+    assert calls == [["save", "corner"]]
+
+    calls.clear()
+    release.clear()
+    results = {}
+    threads = [threading.Thread(target=lambda q=q: results.__setitem__(q, engine.search(q, 1)))
+               for q in ("goal", "save", "foul", "corner")]
+    threads[0].start()
+    while not calls:
+        time.sleep(0.01)
+    for thread in threads[1:]:
+        thread.start()
+    while len(engine._pending) < 3:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == {"goal": ["goal"], "save": ["save"], "foul": ["foul"], "corner": ["goal"]}
+    assert calls[0] == ["goal"] and sorted(calls[1]) == ["corner", "foul", "save"] and len(calls) == 2
+
+def test_query_cache_lru_ttl_and_shared_disk(tmp_path):
+    calls = []
+
+    def encode(texts):
+        calls.append(list(texts))
+        return np.array([[len(t), 1.0] for t in texts], dtype="float32")
+
+    cache = QueryEmbeddingCache("all-MiniLM-L6-v2", max_size=2, ttl=60, cache_dir=str(tmp_path))
+    vectors = cache.encode(["Who won the match?", " who won  the MATCH? ", "Top scorer?"], encode)
+    assert calls == [["who won the match?", "top scorer?"]]  # one model call, repeats collapsed
+    assert vectors[:, 0].tolist() == [18, 18, 11]
+
+    cache.encode(["who won the match?"], encode)
+    cache.encode(["Next fixture?"], encode)  # evicts the least recently used entry, "top scorer?"
+    assert list(cache.entries) == ["who won the match?", "next fixture?"]
+    assert len(calls) == 2
+
+    other = QueryEmbeddingCache("all-MiniLM-L6-v2", max_size=2, ttl=60, cache_dir=str(tmp_path))
+    assert other.encode(["TOP SCORER?"], encode)[0, 0] == 11  # from the shared disk cache, not the model
+    assert len(calls) == 2
+
+    with patch("processing.query_cache.time.monotonic", return_value=time.monotonic() + 120):
+        cache.encode(["next fixture?"], encode)  # expired in memory, found on disk
+    report = cache.report()
+    assert (report["hits"], report["disk_hits"], report["misses"], report["expired"], report["evicted"]) == (1, 1, 3, 1, 1)
+    assert other.report()["disk_hits"] == 1 and len(calls) == 2
+
+def test_query_cache_survives_concurrent_disk_append_and_read_errors(tmp_path):
+    def encode(texts):
+        return np.array([[len(t), 1.0] for t in texts], dtype="float32")
+
+    reader = QueryEmbeddingCache("all-MiniLM-L6-v2", cache_dir=str(tmp_path))
+    writer = QueryEmbeddingCache("all-MiniLM-L6-v2", cache_dir=str(tmp_path))
+    writer.encode(["Who won?"], encode)
+    with open(writer.disk.vectors_path, "ab") as f:
+        f.write(b"\x00" * 6)  # another process mid-append
+    assert reader.encode(["who won?"], encode)[0, 0] == 8
+    assert reader.report()["disk_hits"] == 1
+
+    with patch.object(reader.disk, "get", side_effect=ValueError("torn read")):
+        assert reader.encode(["Top scorer?"], encode)[0, 0] == 11  # not on disk yet: encoded
+        writer.encode(["Next fixture?"], encode)
+        assert reader.encode(["Next fixture?"], encode)[0, 0] == 13  # disk read fails: encoded instead
+    assert reader.report()["disk_errors"] == 1
+
+def test_semantic_answer_cache_matches_question_and_chunks():
+    cache = SemanticAnswerCache(threshold=0.95, max_size=2)
+    ids, texts = [11, 12], ["Arsenal won 2-1.", "Saka scored twice."]
+    cache.put("Who won the match?", np.array([[1.0, 0.1]]), ids, texts, "Arsenal")
+
+    assert cache.get(np.array([[2.0, 0.25]]), ids[::-1], texts[::-1]) == "Arsenal"  # similar question, same set
+    assert cache.get(np.array([[0.1, 1.0]]), ids, texts) is None  # different question
+    assert cache.get(np.array([[1.0, 0.1]]), [11, 13], texts) is None  # different chunks retrieved
+    assert cache.get(np.array([[1.0, 0.1]]), ids, ["Arsenal won 3-1.", texts[1]]) is None  # a chunk was edited
+    assert len(cache) == 0 and cache.report()["stale"] == 1
+
+    cache.put("q1", np.array([[1.0, 0.0]]), [1], ["a"], "A1")
+    cache.put("q2", np.array([[0.0, 1.0]]), [2], ["b"], "A2")
+    cache.put("q3", np.array([[-1.0, 0.0]]), [3], ["c"], "A3")  # evicts q1
+    assert cache.get(np.array([[1.0, 0.0]]), [1], ["a"]) is None
+    assert cache.invalidate([2]) == 1 and cache.get(np.array([[0.0, 1.0]]), [2], ["b"]) is None
+    report = cache.report()
+    assert (report["size"], report["hits"], report["evicted"], report["invalidated"]) == (1, 1, 1, 1)
+
 #  Test Retrieval
 @pytest.fixture
 def qna(tmp_path):
@@ -150,7 +946,7 @@ def test_generate_test_cases(generator):
 
 
 
-from UI.app import FootballQABot
+from UI.app import FootballQABot, load_bot
 
 @pytest.fixture
 def bot(tmp_path):
@@ -191,6 +987,35 @@ def test_log_interaction(bot, tmp_path):
     assert len(logs) > 0
     assert logs[0]["question"] == "Test question?"
 
+def test_load_bot_is_reused_across_reruns():
+    first = load_bot()
+    assert load_bot() is first  # a rerun gets the cached bot, nothing is reloaded
+    assert first.startup_seconds > 0
+
+def test_generate_answer_streams_and_records_first_token(bot):
+    def delta(text):
+        return MagicMock(choices=[MagicMock(delta=MagicMock(content=text))])
+
+    retrieved = (np.ones(384, dtype="float32"), [1], ["Arsenal won 2-1."])
+    with patch.object(bot.engine, "retrieve", return_value=retrieved), \
+         patch.object(bot.client.chat.completions, "create", return_value=iter([delta("Arsenal "), delta("won.")])) as create:
+        timings = {}
+        pieces = list(bot.generate_answer("Who won?", stream=True, timings=timings))
+        assert bot.generate_answer("who won?") == "Arsenal won."  # answer cache: no second API call
+
+    assert pieces == ["Arsenal ", "won."] and create.call_count == 1
+    assert create.call_args.kwargs["stream"] is True
+    assert 0 <= timings["retrieval"] <= timings["first_token"] <= timings["total"]
+    with open(bot.LOG_FILE, "r", encoding="utf-8") as f:
+        assert set(json.load(f)[0]["timings"]) == {"retrieval", "first_token", "total"}
+
+    with patch.object(bot.engine, "retrieve", return_value=(np.ones(384, dtype="float32"), [2], ["Chelsea drew."])), \
+         patch.object(bot.client.chat.completions, "create", return_value=iter([])):
+        assert list(bot.generate_answer("Did Chelsea win?", stream=True)) == []
+    assert len(bot.answer_cache) == 1  # the empty answer was neither cached nor logged
+    with open(bot.LOG_FILE, "r", encoding="utf-8") as f:
+        assert len(json.load(f)) == 2
+
 
 
 
@@ -258,7 +1083,7 @@ def test_evaluate_test_cases_with_ragas(assistant):
     mock_generated_answer = "Generated answer"
 
     with patch.object(assistant, "load_existing_results", return_value=[]), \
-         patch.object(assistant, "get_relevant_chunks", return_value=mock_relevant_chunks), \
+         patch.object(assistant, "get_relevant_chunks_batch", return_value=[mock_relevant_chunks]), \
          patch.object(assistant, "generate_answer", return_value=mock_generated_answer), \
          patch("json.load", return_value=mock_test_cases), \
          patch.object(assistant, "_evaluate_and_save_batch") as mock_save_batch: